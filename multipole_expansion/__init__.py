@@ -17,7 +17,7 @@ Quick Start:
     >>> mp.compute_all(max_order=2)
 """
 
-from .contraction import TensorContraction, create_indexed_product
+from .contraction import TensorContraction, create_indexed_product, get_default_tc
 from .derivatives import DerivativeEngine, generate_derivative_table
 from .taylor_expansion import TaylorExpansion
 from .multipole_moments import MultipoleMoments
@@ -36,6 +36,7 @@ __all__ = [
     "SphericalExpansion",
     "MultipoleExpansion",
     "create_indexed_product",
+    "get_default_tc",
     "generate_derivative_table",
 ]
 
@@ -57,13 +58,14 @@ class MultipoleExpansion:
         """
         self.max_order = max_order
 
-        # Initialize all engines
+        # Initialize all engines around one shared TensorContraction,
+        # so that its contraction cache is reused by every engine
         self.tc = TensorContraction()
-        self.de = DerivativeEngine()
-        self.te = TaylorExpansion()
-        self.mm = MultipoleMoments()
-        self.verifier = Verifier()
-        self.se = SphericalExpansion()
+        self.de = DerivativeEngine(self.tc)
+        self.te = TaylorExpansion(self.tc)
+        self.mm = MultipoleMoments(self.tc)
+        self.verifier = Verifier(self.tc)
+        self.se = SphericalExpansion(self.tc)
 
     def taylor_term(self, n):
         """
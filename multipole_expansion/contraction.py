@@ -10,7 +10,23 @@ Examples:
     δ^{ij} * A^j = A^i (Kronecker delta contraction)
 """
 
-from symbolica import Expression, S
+from symbolica import AtomType, Expression, Replacement, S
+from collections import OrderedDict
+import functools
+
+# Numeric constants shared by the hot loops of this package, so that
+# Expression.num is not called for them on every use.
+_ZERO = Expression.num(0)
+_ONE = Expression.num(1)
+_THREE = Expression.num(3)
+
+# Most contraction results kept per TensorContraction; the least recently
+# used entries are evicted beyond this
+_CONTRACT_CACHE_SIZE = 4096
+
+# Wildcards splitting a power into base and exponent in _expand_if_needed.
+_BASE = S("mpe_base_")
+_POW_PATTERN = _BASE ** S("mpe_exp_")
 
 
 class TensorContraction:
@@ -32,7 +48,7 @@ class TensorContraction:
         # when symbolica sees a string containing "delta",
         # it knows that this string means some symbol self.delta,
         # whose behavior will be defined later in this file:
-        # see line 125, the function _contract_delta.
+        # see the contraction rules in self._rules below.
         self.xa = S("xa")  # Source position
         self.x = S("x")  # Observation position
         self.n = S("n")  # Unit vector n = x/r
@@ -52,6 +68,59 @@ class TensorContraction:
         self.k_ = S("k_")
         self.l_ = S("l_")
 
+        # Contraction patterns and their replacements, built once here so
+        # that no pattern is reconstructed per call.
+        self._pat_xa_xa = self.xa(self.i_) * self.xa(self.i_)
+        self._rep_ra0_sq = self.ra0**2
+        # Symbolica matches products orderlessly, so a single pattern covers
+        # both xa(i)*n(i) and n(i)*xa(i); no reverse-order patterns needed.
+        self._pat_xa_n = self.xa(self.i_) * self.n(self.i_)
+        self._rep_dot_xa_n = self.dot(self.xa, self.n)
+        self._pat_x_x = self.x(self.i_) * self.x(self.i_)
+        self._rep_r0_sq = self.r0**2
+        self._pat_x_n = self.x(self.i_) * self.n(self.i_)
+        self._rep_r0 = self.r0
+        self._pat_n_n = self.n(self.i_) * self.n(self.i_)
+        self._rep_one = _ONE
+        self._pat_delta_xa = self.delta(self.i_, self.j_) * self.xa(self.j_)
+        self._rep_xa_i = self.xa(self.i_)
+        self._pat_delta_n = self.delta(self.i_, self.j_) * self.n(self.j_)
+        self._rep_n_i = self.n(self.i_)
+        self._pat_delta_trace = self.delta(self.i_, self.i_)
+        self._rep_three = _THREE
+
+        # All contraction rules as one list, so that contract_indices can
+        # rewrite the expression in a single fused replace_multiple call
+        # instead of one full traversal per rule.
+        # Delta contractions come first: they create new xa(i)/n(i) factors,
+        # which the vector rules below then contract on the same pass.
+        self._rules = [
+            Replacement(self._pat_delta_xa, self._rep_xa_i),
+            Replacement(self._pat_delta_n, self._rep_n_i),
+            Replacement(self._pat_delta_trace, self._rep_three),
+            Replacement(self._pat_xa_xa, self._rep_ra0_sq),
+            Replacement(self._pat_xa_n, self._rep_dot_xa_n),
+            Replacement(self._pat_x_x, self._rep_r0_sq),
+            Replacement(self._pat_x_n, self._rep_r0),
+            Replacement(self._pat_n_n, self._rep_one),
+        ]
+
+        # x^i = n^i * r for every index i, as one wildcard rule shared by
+        # all engines on this instance, so that every order substitutes all
+        # of its indices in a single pass
+        self.x_to_nr = Replacement(self.x(self.i_), self.n(self.i_) * self.r0)
+
+        # delta(i,j) -> delta(i,j) + delta(j,i), for symmetrize_deltas
+        self._symmetrize_delta = Replacement(
+            self.delta(self.i_, self.j_),
+            self.delta(self.i_, self.j_) + self.delta(self.j_, self.i_),
+        )
+
+        # LRU cache of contracted results, bounded by _CONTRACT_CACHE_SIZE.
+        # Expressions hash structurally, so they can be used directly as
+        # keys without formatting to a string.
+        self._contract_cache = OrderedDict()
+
     def contract_indices(self, expr):
         """
         Apply Einstein summation convention to contract repeated indices.
@@ -65,120 +134,153 @@ class TensorContraction:
         Returns:
             Expression with contracted indices replaced
         """
-        result = expr
+        cache = self._contract_cache
+        if expr in cache:
+            cache.move_to_end(expr)
+            return cache[expr]
+
+        # Apply every rule in one fused pass, repeated until no rule matches
+        # (a fixed point), so the result does not depend on rule order
+        result = expr.replace_multiple(self._rules, repeat=True)
+        cache[expr] = result
+        # The result is a fixed point, so contracting it again is a no-op
+        cache[result] = result
+        while len(cache) > _CONTRACT_CACHE_SIZE:
+            cache.popitem(last=False)
+        return result
 
-        # Contract xa(i) * xa(i) -> ra0^2
-        result = self._contract_xa_xa(result)
+    def contract_to_fixpoint(self, expr, max_passes=8):
+        """
+        Apply contract_indices until the expression stops changing.
 
-        # Contract xa(i) * n(i) -> dot(xa, n)
-        result = self._contract_xa_n(result)
+        Args:
+            expr: Symbolica Expression containing indexed tensors
+            max_passes: Upper bound on the number of passes
 
-        # Contract x(i) * x(i) -> r0^2
-        result = self._contract_x_x(result)
+        Returns:
+            Expression with contracted indices replaced
+        """
+        for _ in range(max_passes):
+            contracted = self.contract_indices(expr)
+            if contracted == expr:
+                break
+            expr = contracted
+        return expr
+
+    def clear_cache(self):
+        """Drop all cached contraction results."""
+        self._contract_cache.clear()
+
+    def symmetrize_deltas(self, expr):
+        """
+        Replace every delta(i,j) by delta(i,j) + delta(j,i) and expand.
 
-        # Contract x(i) * n(i) -> r0
-        result = self._contract_x_n(result)
+        delta is symmetric, but delta(i,j) and delta(j,i) are different
+        expressions; symmetrized forms of equal tensors compare equal.
+        """
+        return expr.replace_multiple([self._symmetrize_delta]).expand()
 
-        # Contract n(i) * n(i) -> 1
-        result = self._contract_n_n(result)
+    def expand_dot_products(self, expr):
+        """
+        Expand dot products back to component form if needed.
+        dot(xa, n) -> xa(i) * n(i)
 
-        # Contract delta(i,j) with vectors
-        result = self._contract_delta(result)
+        This is useful when we need to work with explicit indices again.
+        """
+        pattern = self.dot(self.xa, self.n)
+        # Use a fresh index 'i1' for the expansion
+        i1 = S("i1")
+        replacement = self.xa(i1) * self.n(i1)
+        return expr.replace(pattern, replacement)
 
-        return result
 
-    def _contract_xa_xa(self, expr):
-        """Contract xa(i) * xa(i) = ra0^2"""
-        # Pattern: xa(i_) * xa(i_) where same index appears twice
-        pattern = self.xa(self.i_) * self.xa(self.i_)
-        replacement = self.ra0**2
-        return expr.replace(pattern, replacement)
+# Process-wide TensorContraction shared by engines that are not given one
+_DEFAULT_TC = None
 
-    def _contract_xa_n(self, expr):
-        """Contract xa(i) * n(i) = dot(xa, n)"""
-        pattern = self.xa(self.i_) * self.n(self.i_)
-        replacement = self.dot(self.xa, self.n)
-        # Also handle reverse order
-        result = expr.replace(pattern, replacement)
-        pattern_rev = self.n(self.i_) * self.xa(self.i_)
-        result = result.replace(pattern_rev, replacement)
-        return result
 
-    def _contract_x_x(self, expr):
-        """Contract x(i) * x(i) = r0^2"""
-        pattern = self.x(self.i_) * self.x(self.i_)
-        replacement = self.r0**2
-        return expr.replace(pattern, replacement)
+def get_default_tc():
+    """
+    Return the shared default TensorContraction, creating it on first use.
 
-    def _contract_x_n(self, expr):
-        """Contract x(i) * n(i) = r0 (since n = x/r)"""
-        pattern = self.x(self.i_) * self.n(self.i_)
-        replacement = self.r0
-        result = expr.replace(pattern, replacement)
-        pattern_rev = self.n(self.i_) * self.x(self.i_)
-        result = result.replace(pattern_rev, replacement)
-        return result
+    Engines constructed without an explicit TensorContraction use this
+    instance, so its contraction cache is shared between them.
+    """
+    global _DEFAULT_TC
+    if _DEFAULT_TC is None:
+        _DEFAULT_TC = TensorContraction()
+    return _DEFAULT_TC
 
-    def _contract_n_n(self, expr):
-        """Contract n(i) * n(i) = 1"""
-        pattern = self.n(self.i_) * self.n(self.i_)
-        replacement = Expression.num(1)
-        return expr.replace(pattern, replacement)
 
-    def _contract_delta(self, expr):
-        """
-        Contract Kronecker delta with vectors.
-        delta(i,j) * A(j) = A(i)
-        """
-        # delta(i_, j_) * xa(j_) -> xa(i_)
-        pattern = self.delta(self.i_, self.j_) * self.xa(self.j_)
-        replacement = self.xa(self.i_)
-        result = expr.replace(pattern, replacement)
+@functools.lru_cache(maxsize=64)
+def _default_indices(n):
+    """Return the generic index symbols (i1, ..., in), created once per n."""
+    return tuple(S(f"i{k}") for k in range(1, n + 1))
 
-        # Handle reverse order
-        pattern_rev = self.xa(self.j_) * self.delta(self.i_, self.j_)
-        result = result.replace(pattern_rev, replacement)
 
-        # Same for n(i): contract n_i δ_ij and δ_ij n_j
-        pattern = self.delta(self.i_, self.j_) * self.n(self.j_)
-        replacement = self.n(self.i_)
-        result = result.replace(pattern, replacement)
+def _expand_if_needed(expr):
+    """
+    Expand expr unless it is already a single product of monomial factors.
 
-        pattern_rev = self.n(self.j_) * self.delta(self.i_, self.j_)
-        result = result.replace(pattern_rev, replacement)
+    Contraction matches factors of one product, so nested sums must be
+    distributed first; a product without any sum factor is returned as is.
+    """
+    factors = list(expr) if expr.get_type() == AtomType.Mul else [expr]
+    for factor in factors:
+        if factor.get_type() == AtomType.Add:
+            return expr.expand()
+        if factor.get_type() == AtomType.Pow:
+            base = next(iter(factor.match(_POW_PATTERN)))[_BASE]
+            if base.get_type() == AtomType.Add:
+                return expr.expand()
+    return expr
+
+
+def _balanced_product(factors):
+    """
+    Multiply a list of expressions pairwise in a balanced tree.
 
-        # Because we only have position vector and normal vectors
-        # throughout the calculation, the kronecker delta only needs to
-        # take care of these replacement rules.
+    Multiplying neighbours level by level builds the product with
+    O(log n) depth instead of the O(n) chain of a left-to-right loop,
+    so fewer large intermediate products are created.
 
-        # delta(i_, i_) -> 3 (trace in 3D)
-        pattern = self.delta(self.i_, self.i_)
-        replacement = Expression.num(3)
-        result = result.replace(pattern, replacement)
+    Args:
+        factors: List of Symbolica expressions
 
-        # IMPORTANT: Handle xa(i_)*delta(i_, k_) where i_ is repeated and k_ is free
-        # When i is a dummy index (appears twice), xa(i)*delta(i,k) = xa(k)
-        # This is the key for traceless verification of higher order tensors!
-        # Note: This only applies when i appears elsewhere (making it a dummy index)
+    Returns:
+        Product of all factors (1 if the list is empty)
+    """
+    if not factors:
+        return _ONE
+    while len(factors) > 1:
+        paired = [a * b for a, b in zip(factors[0::2], factors[1::2])]
+        if len(factors) % 2:
+            paired.append(factors[-1])
+        factors = paired
+    return factors[0]
 
-        # Try the contraction (though without knowing dummy vs free, we leave it)
-        # The mathematical simplification xa(i)*delta(i,k) = xa(k) is valid
-        # when i is summed over, which happens in traceless verification
 
-        return result
+def _balanced_sum(terms):
+    """
+    Add a list of expressions pairwise in a balanced tree.
 
-    def expand_dot_products(self, expr):
-        """
-        Expand dot products back to component form if needed.
-        dot(xa, n) -> xa(i) * n(i)
+    The additive counterpart of _balanced_product: each addition
+    re-normalizes its operands, so a balanced fold avoids re-sorting an
+    ever-growing running sum.
 
-        This is useful when we need to work with explicit indices again.
-        """
-        pattern = self.dot(self.xa, self.n)
-        # Use a fresh index 'i1' for the expansion
-        i1 = S("i1")
-        replacement = self.xa(i1) * self.n(i1)
-        return expr.replace(pattern, replacement)
+    Args:
+        terms: List of Symbolica expressions
+
+    Returns:
+        Sum of all terms (0 if the list is empty)
+    """
+    if not terms:
+        return _ZERO
+    while len(terms) > 1:
+        paired = [a + b for a, b in zip(terms[0::2], terms[1::2])]
+        if len(terms) % 2:
+            paired.append(terms[-1])
+        terms = paired
+    return terms[0]
 
 
 def create_indexed_product(tensor_fn, indices):
@@ -196,11 +298,8 @@ def create_indexed_product(tensor_fn, indices):
         >>> create_indexed_product(xa, ['i1', 'i2'])
         xa(i1) * xa(i2)
     """
-    result = Expression.num(1)
-    for idx in indices:
-        idx_sym = S(idx) if isinstance(idx, str) else idx
-        result = result * tensor_fn(idx_sym)
-    return result
+    nodes = [tensor_fn(S(idx) if isinstance(idx, str) else idx) for idx in indices]
+    return _balanced_product(nodes)
 
 
 if __name__ == "__main__":
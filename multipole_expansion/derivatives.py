@@ -7,10 +7,34 @@ This module implements the derivative formulas needed for multipole expansion:
 Key formulas:
     ∂/∂x^i (1/r) = -x^i/r^3 = -n^i/r^2
     ∂²/∂x^i∂x^j (1/r) = (3x^i x^j - δ^{ij} r^2)/r^5 = (3n^i n^j - δ^{ij})/r^3
+
+The derivatives up to order MPE_PRECOMPUTE (environment variable, default 6)
+are built once at import time on placeholder indices and shared by all
+DerivativeEngine instances. Set MPE_PRECOMPUTE=-1 (or any negative value)
+to disable this.
 """
 
-from symbolica import Expression, S
-from .contraction import TensorContraction
+from symbolica import Expression, Replacement, S
+from .contraction import (
+    _ONE,
+    _THREE,
+    _ZERO,
+    _balanced_product,
+    _default_indices,
+    get_default_tc,
+)
+import functools
+import itertools
+import math
+import os
+import warnings
+
+# Derivatives on placeholder indices: order n -> expression on _SLOTS[:n].
+# Filled up to MPE_PRECOMPUTE at import time and extended on demand.
+_PRECOMPUTED = {}
+
+# Placeholder index symbols used for the precomputed derivatives
+_SLOTS = []
 
 
 class DerivativeEngine:
@@ -24,9 +48,14 @@ class DerivativeEngine:
     - delta(i,j) = δ^{ij} (Kronecker delta)
     """
 
-    def __init__(self):
-        """Initialize symbols and contraction engine."""
-        self.tc = TensorContraction()
+    def __init__(self, tc=None):
+        """
+        Initialize symbols and contraction engine.
+
+        Args:
+            tc: TensorContraction to use (the shared default if None)
+        """
+        self.tc = tc if tc is not None else get_default_tc()
 
         # Scalar symbols
         self.r0 = self.tc.r0
@@ -36,8 +65,15 @@ class DerivativeEngine:
         self.n = self.tc.n
         self.delta = self.tc.delta
 
-        # Cache for computed derivatives
+        # Cache for computed derivatives, keyed on (n, index names)
         self._derivative_cache = {}
+        # Cache for contracted derivatives, same keys
+        self._contracted_cache = {}
+
+        # Lookup table of double factorials: self._dfact[k] = k!!
+        # Seeded up to 15!! (enough for n=8) and extended lazily.
+        self._dfact = [1, 1]
+        self._double_factorial(15)
 
     def derivative_1_over_r_power(self, power, index):
         """
@@ -88,7 +124,7 @@ class DerivativeEngine:
         """
         # Using the formula: (3 x^i x^j - δ^{ij} r^2) / r^5
         numerator = (
-            Expression.num(3) * self.x(index1) * self.x(index2)
+            _THREE * self.x(index1) * self.x(index2)
             - self.delta(index1, index2) * self.r0**2
         )
         result = numerator / self.r0**5
@@ -110,16 +146,55 @@ class DerivativeEngine:
         Returns:
             Expression for the n-th derivative
         """
+        if len(indices) != n:
+            raise ValueError(f"Expected {n} indices for order {n}, got {len(indices)}")
+
+        key = (n, tuple(str(i) for i in indices))
+        if key in self._derivative_cache:
+            return self._derivative_cache[key]
+
+        # The derivative is symmetric in its indices, so one build on
+        # placeholder indices serves every choice of index names, orderings
+        # and repetitions: rename the placeholders to the requested indices.
+        # All slots are replaced simultaneously, so repeated or swapped
+        # indices are handled correctly.
+        result = self._slot_derivative(n).replace_multiple(
+            [
+                Replacement(slot, S(idx) if isinstance(idx, str) else idx)
+                for slot, idx in zip(_SLOTS, indices)
+            ]
+        )
+
+        self._derivative_cache[key] = result
+        return result
+
+    def _slot_derivative(self, n):
+        """
+        Return the n-th derivative on the placeholder indices _SLOTS[:n].
+
+        Orders beyond the import-time table are built on first use and
+        added to _PRECOMPUTED, which is shared by all instances.
+        """
+        if n not in _PRECOMPUTED:
+            while len(_SLOTS) < n:
+                _SLOTS.append(S(f"mpe_slot{len(_SLOTS) + 1}"))
+            _PRECOMPUTED[n] = self._compute_derivative(n, _SLOTS[:n])
+        return _PRECOMPUTED[n]
+
+    def _compute_derivative(self, n, indices):
+        """Build the n-th derivative of 1/r from scratch (no caching)."""
         if n == 0:
-            return Expression.num(1) / self.r0
+            result = _ONE / self.r0
         elif n == 1:
-            return self.derivative_1_over_r(indices[0])
+            result = self.derivative_1_over_r(indices[0])
         elif n == 2:
-            return self.second_derivative_1_over_r(indices[0], indices[1])
+            result = self.second_derivative_1_over_r(indices[0], indices[1])
         else:
             # For higher orders, use recursion
             # ∂/∂x^{i_n} [∂^{n-1}/∂x^{i₁}...∂x^{i_{n-1}} (1/r)]
-            return self._recursive_derivative(n, indices)
+            result = self._recursive_derivative(n, indices)
+
+        return result
 
     def _recursive_derivative(self, n, indices):
         """
@@ -152,139 +227,227 @@ class DerivativeEngine:
                     + (2n-5)!! * r⁴ * Σ δ^{...}δ^{...} * x^{...}
                     - ...
         """
+        # Build each x(i) node once and share it between the main term and
+        # every trace term; delta nodes are memoized by position pair.
+        x_nodes = [self.x(idx) for idx in indices]
+        delta_nodes = {}
+
+        # Coefficient (2n-2k-1)!! * r^{2k} of the k-pair terms, for every
+        # k at once, so no trace term recomputes its own coefficient
+        coeffs = self._derivative_coefficients(n)
+
         # Main term: (2n-1)!! * product of all x's
-        main_coeff = self._double_factorial(2 * n - 1)
-        main_term = Expression.num(main_coeff)
-        for idx in indices:
-            main_term = main_term * self.x(idx)
+        main_term = _balanced_product([coeffs[0]] + x_nodes)
 
         # Trace terms: use same algorithm as Q tensor
-        trace_terms = self._compute_all_derivative_traces(n, indices)
+        trace_terms = self._compute_all_derivative_traces(
+            n, indices, x_nodes, delta_nodes, coeffs
+        )
 
         return main_term - trace_terms
 
-    def _compute_all_derivative_traces(self, n, indices):
+    def _derivative_coefficients(self, n):
+        """
+        Return [(2n-2k-1)!! * r^{2k} for k = 0, ..., floor(n/2)].
+
+        Entry k multiplies the sum over pairings with k deltas; entry 0
+        is the coefficient (2n-1)!! of the main term.
+        """
+        return [
+            Expression.num(self._double_factorial(2 * n - 2 * k - 1))
+            * self.r0 ** (2 * k)
+            for k in range(n // 2 + 1)
+        ]
+
+    def _compute_all_derivative_traces(
+        self, n, indices, x_nodes=None, delta_nodes=None, coeffs=None
+    ):
         """
         Compute all trace correction terms for the derivative.
         Same structure as Q tensor but using x instead of xa.
+
+        x_nodes and delta_nodes are the shared node tables described in
+        _derivative_trace_with_k_pairs; coeffs is the list returned by
+        _derivative_coefficients.
         """
-        total = Expression.num(0)
+        if x_nodes is None:
+            x_nodes = [self.x(idx) for idx in indices]
+        if delta_nodes is None:
+            delta_nodes = {}
+        if coeffs is None:
+            coeffs = self._derivative_coefficients(n)
+
+        total = _ZERO
 
         # Number of pairs we can contract: 0, 1, 2, ..., floor(n/2)
         max_pairs = n // 2
 
         for num_pairs in range(1, max_pairs + 1):
-            pair_terms = self._derivative_trace_with_k_pairs(n, indices, num_pairs)
+            pair_terms = self._derivative_trace_with_k_pairs(
+                n, indices, num_pairs, x_nodes, delta_nodes, coeffs[num_pairs]
+            )
             total = total + pair_terms
 
         return total
 
-    def _derivative_trace_with_k_pairs(self, n, indices, k):
+    def _derivative_trace_with_k_pairs(
+        self, n, indices, k, x_nodes=None, delta_nodes=None, coeff=None
+    ):
         """
         Compute derivative trace terms with exactly k pairs of deltas.
         Uses (2n - 2k - 1)!! as coefficient, same as Q tensor.
+
+        Args:
+            n: Order of derivative
+            indices: List of n indices
+            k: Number of delta pairs
+            x_nodes: Optional list with x_nodes[pos] = x(indices[pos])
+            delta_nodes: Optional dict memoizing delta nodes by position pair
+            coeff: Optional precomputed (2n - 2k - 1)!! * r^{2k}
         """
         if k > n // 2:
-            return Expression.num(0)
-
-        # Import pairing generator from multipole_moments
-        # (We'll use a simpler inline version)
-        all_pairings = self._generate_k_pairings(n, k)
+            return _ZERO
 
-        total = Expression.num(0)
+        if x_nodes is None:
+            x_nodes = [self.x(idx) for idx in indices]
+        if delta_nodes is None:
+            delta_nodes = {}
 
-        for pairing in all_pairings:
-            term = Expression.num(1)
+        total = _ZERO
 
+        # The integer pairing data is precomputed and cached per (n, k);
+        # this loop only indexes into it to build the Symbolica terms.
+        for pairing, unpaired in _pairing_table(n, k):
             # Add delta for each pair
-            for i_pos, j_pos in pairing:
-                term = term * self.delta(indices[i_pos], indices[j_pos])
+            factors = []
+            for pair in pairing:
+                if pair not in delta_nodes:
+                    delta_nodes[pair] = self.delta(indices[pair[0]], indices[pair[1]])
+                factors.append(delta_nodes[pair])
 
             # Add x for unpaired indices
-            paired_positions = set()
-            for i_pos, j_pos in pairing:
-                paired_positions.add(i_pos)
-                paired_positions.add(j_pos)
-
-            for pos in range(n):
-                if pos not in paired_positions:
-                    term = term * self.x(indices[pos])
-
-            total = total + term
+            factors.extend(x_nodes[pos] for pos in unpaired)
 
-        # Coefficient: (2n - 2k - 1)!!
-        coeff_arg = 2 * n - 2 * k - 1
-        if coeff_arg > 0:
-            trace_coeff = self._double_factorial(coeff_arg)
-        else:
-            trace_coeff = 1
+            total = total + _balanced_product(factors)
 
-        # Multiply by r^{2k} and coefficient
-        return Expression.num(trace_coeff) * (self.r0 ** (2 * k)) * total
+        # Multiply by r^{2k} and coefficient (2n - 2k - 1)!!
+        if coeff is None:
+            coeff = Expression.num(
+                self._double_factorial(2 * n - 2 * k - 1)
+            ) * self.r0 ** (2 * k)
+        return coeff * total
 
     def _generate_k_pairings(self, n, k):
         """
         Generate all distinct ways to pair k pairs from n indices.
-        Same as in MultipoleMoments.
-        """
-        if k == 0:
-            return [[]]
-
-        if k == 1:
-            return [[(i, j)] for i in range(n) for j in range(i + 1, n)]
-
-        # For k >= 2, recursively build pairings
-        result = []
 
-        for i in range(n):
-            for j in range(i + 1, n):
-                first_pair = (i, j)
-
-                remaining = [idx for idx in range(n) if idx != i and idx != j]
-
-                if len(remaining) >= 2 * (k - 1):
-                    sub_pairings = self._generate_k_pairings(len(remaining), k - 1)
-
-                    for sub_pairing in sub_pairings:
-                        mapped_pairing = [
-                            tuple(remaining[idx] for idx in pair)
-                            for pair in sub_pairing
-                        ]
-                        result.append([first_pair] + mapped_pairing)
-
-        # Remove duplicates
-        unique = []
-        seen = set()
-        for pairing in result:
-            normalized = tuple(sorted([tuple(sorted(p)) for p in pairing]))
-            if normalized not in seen:
-                seen.add(normalized)
-                unique.append(pairing)
-
-        return unique
+        First choose which 2k of the n positions are paired, then
+        enumerate the perfect matchings of those positions. Every
+        pairing is produced exactly once, so no de-duplication is needed.
+        """
+        return [pairing for pairing, _ in _pairing_table(n, k)]
 
     def _double_factorial(self, n):
-        """Compute double factorial n!! = n*(n-2)*(n-4)*..."""
-        if n <= 0:
+        """Compute double factorial n!! = n*(n-2)*(n-4)*... by table lookup."""
+        if n <= 1:
             return 1
-        if n == 1:
-            return 1
-        return n * self._double_factorial(n - 2)
+        # Extend the table iteratively: k!! = k * (k-2)!!
+        while len(self._dfact) <= n:
+            k = len(self._dfact)
+            self._dfact.append(self._dfact[k - 2] * k)
+        return self._dfact[n]
 
     def apply_derivative_with_contraction(self, n, indices):
         """Compute derivative and apply index contraction."""
+        key = (n, tuple(str(i) for i in indices))
+        if key in self._contracted_cache:
+            return self._contracted_cache[key]
+
         deriv = self.nth_derivative_1_over_r(n, indices)
         contracted = self.tc.contract_indices(deriv)
+        self._contracted_cache[key] = contracted
         return contracted
 
 
-def generate_derivative_table(max_order=5):
-    """Generate a table of derivatives up to max_order."""
-    de = DerivativeEngine()
+@functools.lru_cache(maxsize=None)
+def _pairing_table(n, k):
+    """
+    Enumerate the k-pairings of n index positions as plain integers.
+
+    This is the pure combinatorial kernel behind the trace terms: it
+    depends only on (n, k), so it is computed once and cached.
+
+    Returns:
+        Tuple of (pairing, unpaired) entries, where pairing is a tuple of
+        k position pairs (i, j) and unpaired lists the remaining n - 2k
+        positions in increasing order.
+    """
+    # There are C(n, 2k) * (2k-1)!! pairings, with (2k-1)!! = (2k)! / (2^k k!).
+    # The enumeration never repeats a pairing, so the table is allocated at
+    # its exact size up front and filled in place.
+    expected = math.comb(n, 2 * k) * (
+        math.factorial(2 * k) // (2**k * math.factorial(k))
+    )
+    table = [None] * expected
+    count = 0
+    # The matchings of any 2k chosen positions are those of 0..2k-1 with
+    # each number replaced by the chosen position it stands for, so the
+    # matching search runs once per k rather than once per choice
+    base = _base_matchings(k)
+    for chosen in itertools.combinations(range(n), 2 * k):
+        chosen_set = set(chosen)
+        unpaired = tuple(pos for pos in range(n) if pos not in chosen_set)
+        for matching in base:
+            table[count] = (
+                tuple((chosen[a], chosen[b]) for a, b in matching),
+                unpaired,
+            )
+            count += 1
+    return tuple(table)
+
+
+@functools.lru_cache(maxsize=None)
+def _base_matchings(k):
+    """Return every perfect matching of 0..2k-1, in lexicographic order."""
+    return tuple(_matchings(range(2 * k)))
+
+
+def _matchings(items):
+    """
+    Yield every perfect matching of items, each exactly once.
+
+    The first unmatched item is paired with each of the others in turn,
+    giving (2k-1)!! matchings of 2k items. The search is an explicit-stack
+    depth-first traversal rather than Python recursion, so no interpreter
+    frame is allocated per level.
+    """
+    # Each frame is (pairs matched so far, items still unmatched)
+    stack = [((), tuple(items))]
+    while stack:
+        matched, remaining = stack.pop()
+        if not remaining:
+            yield matched
+            continue
+        first, rest = remaining[0], remaining[1:]
+        # Push in reverse so matchings come out in lexicographic order
+        for i in reversed(range(len(rest))):
+            stack.append((matched + ((first, rest[i]),), rest[:i] + rest[i + 1 :]))
+
+
+def generate_derivative_table(max_order=5, de=None):
+    """
+    Generate a table of derivatives up to max_order.
+
+    Args:
+        max_order: Highest derivative order to include
+        de: DerivativeEngine whose cache is reused (a new one if None)
+    """
+    if de is None:
+        de = DerivativeEngine()
     table = {}
 
     for n in range(max_order + 1):
-        indices = [S(f"i{k}") for k in range(1, n + 1)]
+        indices = list(_default_indices(n))
         try:
             deriv = de.nth_derivative_1_over_r(n, indices)
             table[(n, tuple(indices))] = deriv
@@ -294,6 +457,35 @@ def generate_derivative_table(max_order=5):
     return table
 
 
+def _precompute_derivatives(max_order):
+    """Fill _PRECOMPUTED with the derivatives of order 0..max_order."""
+    de = DerivativeEngine()
+    for n in range(max_order + 1):
+        de._slot_derivative(n)
+
+
+def _precompute_order(default=6):
+    """
+    Highest order to precompute at import time, from MPE_PRECOMPUTE.
+
+    A value that is not an integer is ignored with a warning; any negative
+    value is read as -1 (precompute nothing).
+    """
+    value = os.environ.get("MPE_PRECOMPUTE")
+    if value is None:
+        return default
+    try:
+        return max(int(value), -1)
+    except ValueError:
+        warnings.warn(
+            f"Ignoring MPE_PRECOMPUTE={value!r} (not an integer), using {default}"
+        )
+        return default
+
+
+_precompute_derivatives(_precompute_order())
+
+
 if __name__ == "__main__":
     print("Testing Derivative Engine with Recursive Implementation\n")
 
@@ -14,11 +14,29 @@ Examples:
     n=0 (monopole): Q = 1
     n=1 (dipole): Q^i = x_a^i
     n=2 (quadrupole): Q^{ij} = 3 x_a^i x_a^j - δ^{ij} |x_a|²
+
+Like the derivatives, the moments up to order MPE_PRECOMPUTE (default 6)
+are built once at import time on placeholder indices; Q_tensor only
+renames the placeholders to the requested indices.
 """
 
-from symbolica import Expression, S
-from .contraction import TensorContraction
+from symbolica import Expression, Replacement, S
+from .contraction import (
+    _ONE,
+    _ZERO,
+    _balanced_product,
+    _balanced_sum,
+    _default_indices,
+    get_default_tc,
+)
+from .derivatives import _SLOTS, _pairing_table, _precompute_order
+import functools
 import itertools
+import math
+
+# Q tensors on placeholder indices: order n -> expression on _SLOTS[:n].
+# Filled up to MPE_PRECOMPUTE at import time and extended on demand.
+_Q_PRECOMPUTED = {}
 
 
 class MultipoleMoments:
@@ -26,9 +44,14 @@ class MultipoleMoments:
     Compute and manipulate symmetric traceless multipole moments.
     """
 
-    def __init__(self):
-        """Initialize tensor contraction engine."""
-        self.tc = TensorContraction()
+    def __init__(self, tc=None):
+        """
+        Initialize tensor contraction engine.
+
+        Args:
+            tc: TensorContraction to use (the shared default if None)
+        """
+        self.tc = tc if tc is not None else get_default_tc()
 
         # Symbols
         self.xa = self.tc.xa
@@ -38,6 +61,19 @@ class MultipoleMoments:
         self.delta = self.tc.delta
         self.dot = self.tc.dot
 
+        # Cartesian index symbols, keyed on their names
+        self._xyz_indices = {"x": S("x"), "y": S("y"), "z": S("z")}
+
+        # Expanded Q * n...n / (n! r^{n+1}) on placeholder indices, keyed on n
+        self._phi_templates = {}
+        # Q tensors on requested indices, keyed on (n, index names)
+        self._q_cache = {}
+
+        # Lookup table of double factorials: self._dfact[k] = k!!
+        # Seeded up to 15!! (enough for n=8) and extended lazily.
+        self._dfact = [1, 1]
+        self._double_factorial(15)
+
     def Q_tensor(self, n, indices=None):
         """
         Compute the symmetric traceless multipole moment Q^{i₁...iₙ}.
@@ -52,22 +88,78 @@ class MultipoleMoments:
             Expression for Q^{i₁...iₙ}
         """
         if indices is None:
-            indices = [S(f"i{k}") for k in range(1, n + 1)]  # indices = [1,2,...,n]
-        # Edge cases first
+            indices = list(_default_indices(n))  # indices = [1,2,...,n]
         if n == 0:
             return self._Q_0()
-        elif n == 1:
-            return self._Q_1(indices[0])
-        else:
-            # None-edge cases,
-            # Use general formula for n >= 2
-            return self._Q_n_general(n, indices)
+
+        key = (n, tuple(str(i) for i in indices))
+        if key in self._q_cache:
+            return self._q_cache[key]
+
+        # Q is built once per order on placeholder indices, then the
+        # placeholders are renamed to the requested indices. The renaming
+        # is positional, so delta arguments keep the order a direct build
+        # would give them, and repeated indices (traces) are handled too.
+        result = self._rename_slots(self._slot_Q(n), n, indices)
+
+        self._q_cache[key] = result
+        return result
+
+    def _rename_slots(self, expr, n, indices):
+        """
+        Rename the placeholder indices _SLOTS[:n] in expr to indices, all at once.
+
+        Raises ValueError unless exactly n indices are given, so that no
+        placeholder is left in (or cached with) the result.
+        """
+        if len(indices) != n:
+            raise ValueError(f"Expected {n} indices for order {n}, got {len(indices)}")
+        return expr.replace_multiple(
+            [Replacement(slot, idx) for slot, idx in zip(_SLOTS, indices)]
+        )
+
+    def _slot_Q(self, n):
+        """
+        Return Q^{i₁...iₙ} on the placeholder indices _SLOTS[:n].
+
+        Orders beyond the import-time table are built on first use and
+        added to _Q_PRECOMPUTED, which is shared by all instances.
+        """
+        if n not in _Q_PRECOMPUTED:
+            while len(_SLOTS) < n:
+                _SLOTS.append(S(f"mpe_slot{len(_SLOTS) + 1}"))
+            slots = _SLOTS[:n]
+            # Edge cases first
+            if n == 1:
+                _Q_PRECOMPUTED[n] = self._Q_1(slots[0])
+            else:
+                # None-edge cases,
+                # Use general formula for n >= 2
+                _Q_PRECOMPUTED[n] = self._Q_n_general(n, slots)
+        return _Q_PRECOMPUTED[n]
+
+    def _slot_phi_terms(self, n):
+        """
+        Return Q * n^{i₁}...n^{iₙ} / (n! r^{n+1}) on _SLOTS[:n], expanded.
+
+        Built and expanded once per order, so phi_from_Q only renames the
+        placeholders and never expands on the call path.
+        """
+        if n not in self._phi_templates:
+            Q = self._slot_Q(n)  # Also creates the placeholder symbols
+            slots = _SLOTS[:n]
+            factorial = self._factorial(n)
+            denominator = Expression.num(factorial) * self.r0 ** (n + 1)
+            self._phi_templates[n] = (
+                Q * _balanced_product([self.n(slot) for slot in slots]) / denominator
+            ).expand()
+        return self._phi_templates[n]
 
     def _Q_0(self):
         """
         Monopole moment: Q = 1
         """
-        return Expression.num(1)
+        return _ONE
 
     def _Q_1(self, i):
         """
@@ -142,19 +234,22 @@ class MultipoleMoments:
         When used in φ^(n) = (1/n!) * Q * n...n / r^{n+1}, this gives the same
         result as the Taylor expansion φ^(n) = ((-1)^n/n!) * x_a * ∂^n(1/r).
         """
+        # Build each x_a(i) node once and share it between the main term and
+        # every trace term; delta nodes are memoized by position pair.
+        xa_nodes = [self.xa(idx) for idx in indices]
+        delta_nodes = {}
+
         # Main product term: (2n-1)!! * x_a^{i₁} * ... * x_a^{iₙ}
         # Use double factorial to match derivative normalization
         main_coeff = self._double_factorial(2 * n - 1)
-        product = Expression.num(main_coeff)
-        for idx in indices:
-            product = product * self.xa(idx)
+        product = _balanced_product([Expression.num(main_coeff)] + xa_nodes)
 
         # Add trace terms (which now include the alternating (-1)^m signs)
-        trace_terms = self._compute_all_traces(n, indices)
+        trace_terms = self._compute_all_traces(n, indices, xa_nodes, delta_nodes)
 
         return product + trace_terms
 
-    def _compute_all_traces(self, n, indices):
+    def _compute_all_traces(self, n, indices, xa_nodes=None, delta_nodes=None):
         """
         Compute all trace correction terms for arbitrary n.
 
@@ -165,21 +260,28 @@ class MultipoleMoments:
             + ...
 
         Note: The alternating sign (-1)^m is built into each term.
+
+        xa_nodes and delta_nodes are the shared node tables described in
+        _trace_with_k_pairs.
         """
-        total = Expression.num(0)
+        if xa_nodes is None:
+            xa_nodes = [self.xa(idx) for idx in indices]
+        if delta_nodes is None:
+            delta_nodes = {}
 
         # Number of pairs we can contract: 0, 1, 2, ..., floor(n/2)
         max_pairs = n // 2
         # Sum over k =number of δ symbols
         #            =number of contracted pairs
         #            =num_pairs
-        for num_pairs in range(1, max_pairs + 1):
-            pair_terms = self._trace_with_k_pairs(n, indices, num_pairs)
-            total = total + pair_terms
-
-        return total
+        return _balanced_sum(
+            [
+                self._trace_with_k_pairs(n, indices, num_pairs, xa_nodes, delta_nodes)
+                for num_pairs in range(1, max_pairs + 1)
+            ]
+        )
 
-    def _trace_with_k_pairs(self, n, indices, k):
+    def _trace_with_k_pairs(self, n, indices, k, xa_nodes=None, delta_nodes=None):
         """
         Compute trace terms with exactly k pairs of deltas.
 
@@ -191,34 +293,21 @@ class MultipoleMoments:
         For k=1: -1 * (2n-3)!!
         For k=2: +1 * (2n-5)!!
         For k=3: -1 * (2n-7)!!
+
+        Args:
+            n: Order of the multipole
+            indices: List of n indices
+            k: Number of delta pairs
+            xa_nodes: Optional list with xa_nodes[pos] = xa(indices[pos])
+            delta_nodes: Optional dict memoizing delta nodes by position pair
         """
         if k > n // 2:
-            return Expression.num(0)
-
-        # Generate all ways to choose k pairs from n indices
-        all_pairings = self._generate_k_pairings(n, k)
-
-        total = Expression.num(0)
-
-        for pairing in all_pairings:
-            term = Expression.num(1)
-
-            # Add delta for each pair
-            for i_pos, j_pos in pairing:
-                term = term * self.delta(indices[i_pos], indices[j_pos])
-
-            # Specify paired positions
-            paired_positions = set()
-            for i_pos, j_pos in pairing:
-                paired_positions.add(i_pos)
-                paired_positions.add(j_pos)
+            return _ZERO
 
-            # Add x_a for unpaired indices
-            for pos in range(n):
-                if pos not in paired_positions:
-                    term = term * self.xa(indices[pos])
-
-            total = total + term
+        if xa_nodes is None:
+            xa_nodes = [self.xa(idx) for idx in indices]
+        if delta_nodes is None:
+            delta_nodes = {}
 
         # Coefficient for k-pair trace:
         # Use (2n - 2k - 1)!! to match the derivative pattern
@@ -230,10 +319,37 @@ class MultipoleMoments:
             # For coeff_arg <= 0 (all indices paired), coefficient is 1
             trace_coeff = 1
 
-        # Multiply by |x_a|^{2k} and coefficient
+        # Coefficient times |x_a|^{2k}, built once for all pairings
         # Include the alternating sign (-1)^m where m=k is the number of delta pairs
         sign = (-1) ** k
-        return Expression.num(sign * trace_coeff) * (self.ra0 ** (2 * k)) * total
+        coeff = Expression.num(sign * trace_coeff) * self.ra0 ** (2 * k)
+
+        # Collect the terms and factors in lists and build each product and
+        # the final sum in one balanced fold, rather than one binary
+        # operation (and re-normalization) at a time
+        terms = []
+
+        # All ways to choose k pairs from n indices, each with its unpaired
+        # positions; the integer table is precomputed and cached per (n, k)
+        for pairing, unpaired in _pairing_table(n, k):
+            # Add delta for each pair
+            factors = []
+            for pair in pairing:
+                if pair not in delta_nodes:
+                    delta_nodes[pair] = self.delta(indices[pair[0]], indices[pair[1]])
+                factors.append(delta_nodes[pair])
+
+            if 2 * k == n:
+                # All indices paired: the term is a product of deltas only
+                terms.append(_balanced_product(factors))
+                continue
+
+            # Add x_a for unpaired indices
+            factors.extend(xa_nodes[pos] for pos in unpaired)
+
+            terms.append(_balanced_product(factors))
+
+        return coeff * _balanced_sum(terms)
 
     def _generate_k_pairings(self, n, k):
         """
@@ -242,54 +358,10 @@ class MultipoleMoments:
         For k=1: C(n, 2) = n(n-1)/2 pairings
         For k=2: Ways to choose 2 non-overlapping pairs
 
-        Returns list of pairings, each pairing is list of (i,j) tuples.
+        Returns tuple of pairings, each pairing is a tuple of (i,j) tuples.
+        The result is cached, see _gen_k_pairings_cached.
         """
-        if k == 0:
-            return [[]]
-
-        if k == 1:
-            # All possible pairs
-            return [[(i, j)] for i in range(n) for j in range(i + 1, n)]
-
-        # For k >= 2, recursively build pairings
-        result = []
-
-        # Choose first pair
-        for i in range(n):
-            for j in range(i + 1, n):
-                first_pair = (i, j)
-
-                # Get remaining indices
-                remaining = [idx for idx in range(n) if idx != i and idx != j]
-
-                # There remains k-1 pairs, i.e. 2*(k-1) indices, to be paired,
-                # which is only possible if
-                # there are at least 2*(k-1) remaining indices.
-                if len(remaining) >= 2 * (k - 1):
-                    # Recursively pair the rest
-                    # Map remaining indices to 0..len(remaining)-1
-                    sub_pairings = self._generate_k_pairings(len(remaining), k - 1)
-
-                    for sub_pairing in sub_pairings:
-                        # Map back to original indices
-                        mapped_pairing = [
-                            tuple(remaining[idx] for idx in pair)
-                            for pair in sub_pairing
-                        ]
-                        result.append([first_pair] + mapped_pairing)
-
-        # Remove duplicates, just for security. The previous code
-        # has already enforced i<j in indices to avoid double counting.
-        unique = []
-        seen = set()
-        for pairing in result:
-            # Normalize: sort pairs within pairing, then sort the pairing
-            normalized = tuple(sorted([tuple(sorted(p)) for p in pairing]))
-            if normalized not in seen:
-                seen.add(normalized)
-                unique.append(pairing)
-
-        return unique
+        return _gen_k_pairings_cached(n, k)
 
     def phi_from_Q(self, n, indices=None):
         """
@@ -305,61 +377,82 @@ class MultipoleMoments:
             Expression for φ^(n) in terms of Q
         """
         if indices is None:
-            indices = [S(f"i{k}") for k in range(1, n + 1)]
+            indices = list(_default_indices(n))
 
-        # Get Q tensor
-        Q = self.Q_tensor(n, indices)
-
-        # Multiply by n^{i₁} * ... * n^{iₙ}
-        for idx in indices:
-            Q = Q * self.n(idx)
-
-        # Divide by r^{n+1}
-        Q = Q / self.r0 ** (n + 1)
-
-        # Divide by n!
-        factorial = self._factorial(n)
-        Q = Q / factorial
-
-        # IMPORTANT: Expand before contracting to distribute products
-        Q = Q.expand()
+        # The monopole has no indices to contract: φ^(0) = 1/r
+        if n == 0:
+            return self._Q_0() / self.r0
 
-        # Contract indices (apply multiple times to ensure full contraction)
-        # For high orders (n>=7), need more passes
-        num_passes = max(5, n + 2)
-        result = Q
-        for _ in range(num_passes):
-            result = self.tc.contract_indices(result)
+        # Q * n^{i₁} * ... * n^{iₙ} / (n! r^{n+1}) as a flat sum of monomials,
+        # which contraction needs as separate products. The template is
+        # built once per order, so here only the renaming is paid for.
+        Q = self._rename_slots(self._slot_phi_terms(n), n, indices)
 
-        return result
+        # Contract indices until the expression stops changing (a fixed
+        # point), with a generous cap on the number of passes
+        return self.tc.contract_to_fixpoint(Q, max_passes=2 * n + 4)
 
     def _factorial(self, n):
         """Compute n!"""
-        if n <= 0:
-            return 1
-        result = 1
-        for i in range(1, n + 1):
-            result *= i
-        return result
+        return math.factorial(max(n, 0))
 
     def _double_factorial(self, n):
         """
-        Compute double factorial n!! = n*(n-2)*(n-4)*...
+        Compute double factorial n!! = n*(n-2)*(n-4)*... by table lookup.
 
         For odd n: 1*3*5*...*(2k+1)
         For even n: 2*4*6*...*2k
         """
-        if n <= 0:
+        if n <= 1:
             return 1
-        if n == 1:
-            return 1
-        return n * self._double_factorial(n - 2)
+        # Extend the table iteratively: k!! = k * (k-2)!!
+        while len(self._dfact) <= n:
+            k = len(self._dfact)
+            self._dfact.append(self._dfact[k - 2] * k)
+        return self._dfact[n]
+
+
+@functools.lru_cache(maxsize=None)
+def _gen_k_pairings_cached(n, k):
+    """
+    Generate all distinct k-pairings of n index positions.
+
+    The pairings depend only on (n, k), so they are computed once and
+    cached; the result is built from tuples so it is safe to share.
+    """
+    if k == 0:
+        return ((),)
+
+    if k == 1:
+        # All possible pairs
+        return tuple(((i, j),) for i, j in itertools.combinations(range(n), 2))
+
+    # For k >= 2, choose the 2k paired positions and take every perfect
+    # matching of them: each pairing appears exactly once, C(n, 2k) * (2k-1)!!
+    # in total, with no overshoot to filter
+    return tuple(pairing for pairing, _ in _pairing_table(n, k))
+
+
+# MultipoleMoments shared by the module-level validators
+_MM_SINGLETON = None
+
+
+def _get_mm():
+    """Return the shared MultipoleMoments, creating it on first use."""
+    global _MM_SINGLETON
+    if _MM_SINGLETON is None:
+        _MM_SINGLETON = MultipoleMoments()
+    return _MM_SINGLETON
 
 
 def verify_symmetry(Q_expr, indices, tc):
     """
     Verify that Q^{i₁...iₙ} is symmetric under index permutations.
 
+    The adjacent transpositions (i_k i_{k+1}) generate all permutations
+    of the indices, so it is enough to check those n-1 swaps instead of
+    all n! permutations.
+
     Args:
         Q_expr: Expression for Q tensor
         indices: List of index symbols
@@ -368,19 +461,21 @@ def verify_symmetry(Q_expr, indices, tc):
     Returns:
         True if symmetric, False otherwise
     """
-    # Generate all permutations of indices
-    perms = list(itertools.permutations(indices))
-
-    # For each permutation, check if Q(...) equals Q(permuted)
-    # This is symbolic, so we'd need to substitute and compare
+    print(f"Checking symmetry for {max(len(indices) - 1, 0)} adjacent swaps...")
 
-    # Simplified check: just verify a few permutations
-    print(f"Checking symmetry for {len(perms)} permutations...")
+    # delta is symmetric, but delta(i,j) and delta(j,i) are different
+    # expressions; compare with every delta replaced by its symmetrization
+    Q_sym = tc.symmetrize_deltas(Q_expr)
 
-    # In practice, we'd substitute specific values or use Symbolica's
-    # pattern matching to verify symbolic equality
+    for k in range(len(indices) - 1):
+        a, b = indices[k], indices[k + 1]
+        # Swap the two indices simultaneously
+        Q_swapped = Q_expr.replace_multiple([Replacement(a, b), Replacement(b, a)])
+        diff = tc.symmetrize_deltas(Q_swapped) - Q_sym
+        if not diff.expand() == 0:
+            return False
 
-    return True  # Placeholder
+    return True
 
 
 def verify_traceless(Q_expr, indices, tc):
@@ -406,7 +501,7 @@ def verify_traceless(Q_expr, indices, tc):
     contracted_indices = [i_same, i_same] + indices[2:]
 
     # Compute Q with contracted indices
-    mm = MultipoleMoments()
+    mm = _get_mm()
     Q_contracted = mm.Q_tensor(len(indices), contracted_indices)
 
     # Apply contraction
@@ -420,6 +515,16 @@ def verify_traceless(Q_expr, indices, tc):
     return True  # Placeholder
 
 
+def _precompute_Q_tensors(max_order):
+    """Fill _Q_PRECOMPUTED with the Q tensors of order 1..max_order."""
+    mm = MultipoleMoments()
+    for n in range(1, max_order + 1):
+        mm._slot_Q(n)
+
+
+_precompute_Q_tensors(_precompute_order())
+
+
 if __name__ == "__main__":
     print("Testing Multipole Moments Module\n")
 
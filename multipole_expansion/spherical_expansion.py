@@ -17,9 +17,9 @@ This is done through the spherical harmonics addition theorem and
 the traceless symmetric tensor decomposition.
 """
 
-from symbolica import Expression, S
-from .contraction import TensorContraction
-from .multipole_moments import MultipoleMoments
+from symbolica import S
+from .contraction import _ONE, get_default_tc
+from .multipole_moments import MultipoleMoments, _get_mm
 import math
 
 
@@ -28,10 +28,15 @@ class SphericalExpansion:
     Convert Cartesian multipole moments to spherical form.
     """
 
-    def __init__(self):
-        """Initialize engines."""
-        self.tc = TensorContraction()
-        self.mm = MultipoleMoments()
+    def __init__(self, tc=None):
+        """
+        Initialize engines.
+
+        Args:
+            tc: TensorContraction shared by all engines (default if None)
+        """
+        self.tc = tc if tc is not None else get_default_tc()
+        self.mm = MultipoleMoments(self.tc)
 
         # Cartesian components (source position)
         self.xa = self.tc.xa
@@ -46,7 +51,17 @@ class SphericalExpansion:
         self.phi = S("phi")
         self.r = self.tc.r0
 
-    def q_lm(self, l, m):
+        # Cartesian components of the source and the imaginary unit, built
+        # once and shared by the q_lm formulas
+        self._x = self.xa(S("x"))
+        self._y = self.xa(S("y"))
+        self._z = self.xa(S("z"))
+        self._I = S("I")
+
+        # Cache for symbolic moments, keyed on (l, m)
+        self._q_lm_cache = {}
+
+    def q_lm(self, l, m, x=None, y=None, z=None):
         """
         Compute spherical multipole moment q_{lm}.
 
@@ -55,6 +70,24 @@ class SphericalExpansion:
 
         where Y_{lm} are spherical harmonics.
 
+        Args:
+            l: Angular momentum quantum number (l >= 0)
+            m: Magnetic quantum number (-l <= m <= l)
+            x, y, z: Optional source coordinates; if given, the numeric
+                value is returned (see q_lm_numeric)
+
+        Returns:
+            Expression for q_{lm} in terms of Cartesian components,
+            or its complex value at (x, y, z)
+        """
+        if x is not None:
+            return self.q_lm_numeric(l, m, x, y, z)
+        return self.q_lm_symbolic(l, m)
+
+    def q_lm_symbolic(self, l, m):
+        """
+        Compute q_{lm} as a symbolic expression in the components x_a^i.
+
         Args:
             l: Angular momentum quantum number (l >= 0)
             m: Magnetic quantum number (-l <= m <= l)
@@ -62,19 +95,26 @@ class SphericalExpansion:
         Returns:
             Expression for q_{lm} in terms of Cartesian components
         """
+        key = (l, m)
+        if key in self._q_lm_cache:
+            return self._q_lm_cache[key]
+
         if abs(m) > l:
             raise ValueError(f"m must satisfy -l <= m <= l, got l={l}, m={m}")
 
         # For now, we provide the connection formulas for low l values
         if l == 0:
-            return self._q_00()
+            result = self._q_00()
         elif l == 1:
-            return self._q_1m(m)
+            result = self._q_1m(m)
         elif l == 2:
-            return self._q_2m(m)
+            result = self._q_2m(m)
         else:
             raise NotImplementedError(f"q_{{lm}} for l={l} not yet implemented")
 
+        self._q_lm_cache[key] = result
+        return result
+
     def _q_00(self):
         """
         Monopole: q_{0,0} = √(1/4π)
@@ -83,7 +123,7 @@ class SphericalExpansion:
         """
         # Y_{0,0} = √(1/4π), so q_{0,0} = √(1/4π) for unit charge
         # We'll use unnormalized form: q_{0,0} = 1
-        return Expression.num(1)
+        return _ONE
 
     def _q_1m(self, m):
         """
@@ -96,21 +136,19 @@ class SphericalExpansion:
 
         Here we use convention: x_a^1=x, x_a^2=y, x_a^3=z
         """
-        # Define Cartesian components
-        # xa(1) = x, xa(2) = y, xa(3) = z
+        # Cartesian components: xa(1) = x, xa(2) = y, xa(3) = z
+        # We'll represent complex numbers symbolically
+        i_unit = self._I  # Imaginary unit
 
         if m == 0:
             # q_{1,0} ∝ z_a
-            return self.xa(S("z"))
+            return self._z
         elif m == 1:
             # q_{1,1} ∝ -(x + iy)
-            # We'll represent complex numbers symbolically
-            i_unit = S("I")  # Imaginary unit
-            return -(self.xa(S("x")) + i_unit * self.xa(S("y")))
+            return -(self._x + i_unit * self._y)
         elif m == -1:
             # q_{1,-1} ∝ (x - iy)
-            i_unit = S("I")
-            return self.xa(S("x")) - i_unit * self.xa(S("y"))
+            return self._x - i_unit * self._y
         else:
             raise ValueError(f"Invalid m={m} for l=1")
 
@@ -125,12 +163,12 @@ class SphericalExpansion:
 
         These are related to the traceless Q tensor.
         """
-        i_unit = S("I")
+        i_unit = self._I
 
         # Get Cartesian components
-        x = self.xa(S("x"))
-        y = self.xa(S("y"))
-        z = self.xa(S("z"))
+        x = self._x
+        y = self._y
+        z = self._z
 
         if m == 0:
             # q_{2,0} ∝ 3z² - r²
@@ -157,6 +195,49 @@ class SphericalExpansion:
         else:
             raise ValueError(f"Invalid m={m} for l=2")
 
+    def q_lm_numeric(self, l, m, x, y, z):
+        """
+        Evaluate q_{lm} at the source position (x, y, z).
+
+        Uses the same closed forms as q_lm_symbolic with plain complex
+        arithmetic, so no Symbolica expression is built. The coordinates
+        may be any numbers, or arrays supporting arithmetic with complex
+        scalars (the formulas are polynomials).
+
+        Args:
+            l: Angular momentum quantum number (0 <= l <= 2)
+            m: Magnetic quantum number (-l <= m <= l)
+            x, y, z: Cartesian coordinates of the source
+
+        Returns:
+            Complex value of q_{lm}
+        """
+        if abs(m) > l:
+            raise ValueError(f"m must satisfy -l <= m <= l, got l={l}, m={m}")
+
+        if l == 0:
+            return 1 + 0j
+        elif l == 1:
+            if m == 0:
+                return z + 0j
+            elif m == 1:
+                return -(x + 1j * y)
+            else:
+                return x - 1j * y
+        elif l == 2:
+            if m == 0:
+                return 2 * z**2 - x**2 - y**2 + 0j
+            elif m == 1:
+                return -(x + 1j * y) * z
+            elif m == -1:
+                return (x - 1j * y) * z
+            elif m == 2:
+                return (x + 1j * y) ** 2
+            else:
+                return (x - 1j * y) ** 2
+        else:
+            raise NotImplementedError(f"q_{{lm}} for l={l} not yet implemented")
+
     def Q_to_q_conversion(self, l, verbose=True):
         """
         Show the conversion from Cartesian Q^{i₁...iₗ} to spherical q_{lm}.
@@ -226,18 +307,37 @@ class SphericalExpansion:
             print()
 
 
-def compare_cartesian_spherical(n=2):
+# SphericalExpansion shared by compare_cartesian_spherical
+_SE_SINGLETON = None
+
+
+def _get_se():
+    """Return the shared SphericalExpansion, creating it on first use."""
+    global _SE_SINGLETON
+    if _SE_SINGLETON is None:
+        _SE_SINGLETON = SphericalExpansion()
+    return _SE_SINGLETON
+
+
+def compare_cartesian_spherical(n=2, mm=None, se=None):
     """
     Compare the Cartesian and spherical representations for order n.
 
     For n=2 (quadrupole), show how Q^{ij} components relate to q_{2,m}.
+
+    Args:
+        n: Order of the multipole
+        mm: MultipoleMoments to use (a shared instance if None)
+        se: SphericalExpansion to use (a shared instance if None)
     """
     print("=" * 70)
     print(f"CARTESIAN vs SPHERICAL COMPARISON (n={n})")
     print("=" * 70)
 
-    mm = MultipoleMoments()
-    se = SphericalExpansion()
+    if mm is None:
+        mm = _get_mm()
+    if se is None:
+        se = _get_se()
 
     # Cartesian Q tensor
     print("\nCartesian Q tensor:")
@@ -249,9 +349,9 @@ def compare_cartesian_spherical(n=2):
 
     # Specific components
     print("Specific components:")
-    for idx1 in ["x", "y", "z"]:
-        for idx2 in ["x", "y", "z"]:
-            Q_comp = mm.Q_tensor(n, [S(idx1), S(idx2)])
+    for idx1, sym1 in mm._xyz_indices.items():
+        for idx2, sym2 in mm._xyz_indices.items():
+            Q_comp = mm.Q_tensor(n, [sym1, sym2])
             print(f"  Q^{{{idx1}{idx2}}} = {Q_comp}")
     print()
 
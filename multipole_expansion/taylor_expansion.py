@@ -9,12 +9,45 @@ where:
 
 The key challenge is handling the sum over all index combinations with
 proper contraction of repeated indices.
+
+Computed terms can be kept on disk: TaylorExpansion.compile_up_to pickles
+them to the file named by cache_path (or the MPE_PHI_CACHE environment
+variable), and later instances load that file instead of recomputing.
+The file is tagged with _CACHE_FORMAT, and a file with another tag is
+ignored. Unpickling can run arbitrary code from the file, so only point
+the cache at files you wrote yourself.
 """
 
 from symbolica import Expression, S
-from .contraction import TensorContraction, create_indexed_product
+from .contraction import (
+    _ONE,
+    _balanced_product,
+    _balanced_sum,
+    _default_indices,
+    _expand_if_needed,
+    create_indexed_product,
+    get_default_tc,
+)
 from .derivatives import DerivativeEngine
 import itertools
+import os
+import pickle
+import warnings
+
+# Index symbols of the low-order terms, created once
+_I = S("i")
+_J = S("j")
+
+# Lookup table of factorials shared by all instances: _FACT[k] = k!,
+# extended lazily by TaylorExpansion._factorial
+_FACT = [1]
+
+# Tag stored with the pickled term cache; bump it whenever the terms
+# produced by phi_n change, so that older cache files are rejected
+_CACHE_FORMAT = "mpe-phi-cache-1"
+
+# Rational Taylor coefficients (-1)^n / n! by order, each built once
+_COEFF = {}
 
 
 class TaylorExpansion:
@@ -22,10 +55,17 @@ class TaylorExpansion:
     Implements the multipole Taylor expansion.
     """
 
-    def __init__(self):
-        """Initialize with contraction and derivative engines."""
-        self.tc = TensorContraction()
-        self.de = DerivativeEngine()
+    def __init__(self, tc=None, cache_path=None):
+        """
+        Initialize with contraction and derivative engines.
+
+        Args:
+            tc: TensorContraction to use (the shared default if None)
+            cache_path: File of pickled terms written by compile_up_to
+                (default: the MPE_PHI_CACHE environment variable, if set)
+        """
+        self.tc = tc if tc is not None else get_default_tc()
+        self.de = DerivativeEngine(self.tc)
 
         # Symbols
         self.xa = self.tc.xa
@@ -35,6 +75,73 @@ class TaylorExpansion:
         self.dot = self.tc.dot
         self.delta = self.tc.delta
 
+        # x^i = n^i * r for every index i (see TensorContraction.x_to_nr)
+        self._x_to_nr = self.tc.x_to_nr
+
+        # Constant factors of the low-order terms, built once
+        self._one_over_r = _ONE / self.r0
+        self._half = _ONE / 2
+
+        # Cache for computed terms, keyed on (n, use_contraction)
+        self._phi_cache = {}
+        self.cache_path = cache_path or os.environ.get("MPE_PHI_CACHE")
+        self._load_cache_if_exists()
+
+    def _load_cache_if_exists(self):
+        """
+        Fill the term cache from cache_path, if that file exists.
+
+        A file that cannot be read, or that was written with another
+        _CACHE_FORMAT, is ignored with a warning; the terms are then
+        recomputed on demand. The file is unpickled, so it must be trusted.
+        """
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "rb") as f:
+                data = pickle.load(f)
+        except Exception as e:
+            warnings.warn(f"Ignoring unreadable φ cache {self.cache_path}: {e}")
+            return
+
+        if not isinstance(data, dict) or data.get("format") != _CACHE_FORMAT:
+            warnings.warn(
+                f"Ignoring φ cache {self.cache_path}: not written with "
+                f"format {_CACHE_FORMAT!r}"
+            )
+            return
+        self._phi_cache.update(data["terms"])
+
+    def compile_up_to(self, max_order, use_contraction=True, path=None):
+        """
+        Compute φ^(0) ... φ^(max_order) and pickle the term cache to disk.
+
+        Instances created later with the same cache file load these terms
+        instead of rebuilding them. The file is tagged with _CACHE_FORMAT,
+        and instances reject files with another tag.
+
+        Args:
+            max_order: Maximum order to compute
+            use_contraction: If True, apply index contraction rules
+            path: File to write (default: cache_path)
+
+        Returns:
+            Path of the written file, or None if no file is configured
+        """
+        for n in range(max_order + 1):
+            self.phi_n(n, use_contraction)
+
+        path = path or self.cache_path
+        if not path:
+            return None
+        # Write to a temporary file first, so that a reader never sees a
+        # partially written cache
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"format": _CACHE_FORMAT, "terms": self._phi_cache}, f)
+        os.replace(tmp_path, path)
+        return path
+
     def phi_n(self, n, use_contraction=True):
         """
         Compute the n-th term in the multipole expansion.
@@ -48,20 +155,27 @@ class TaylorExpansion:
         Returns:
             Expression for φ^(n)
         """
+        key = (n, use_contraction)
+        if key in self._phi_cache:
+            return self._phi_cache[key]
+
         if n == 0:
-            return self._phi_0()
+            result = self._phi_0()
         elif n == 1:
-            return self._phi_1(use_contraction)
+            result = self._phi_1(use_contraction)
         elif n == 2:
-            return self._phi_2(use_contraction)
+            result = self._phi_2(use_contraction)
         else:
-            return self._phi_n_general(n, use_contraction)
+            result = self._phi_n_general(n, use_contraction)
+
+        self._phi_cache[key] = result
+        return result
 
     def _phi_0(self):
         """
         Monopole term: φ^(0) = 1/r
         """
-        return Expression.num(1) / self.r0
+        return self._one_over_r
 
     def _phi_1(self, use_contraction=True):
         """
@@ -69,8 +183,8 @@ class TaylorExpansion:
 
         Result (after contraction): dot(xa, n) / r^2 = (x_a · x) / r^3
         """
-        # Create index
-        i = S("i")
+        # Index
+        i = _I
 
         # x_a^i
         xa_i = self.xa(i)
@@ -86,10 +200,9 @@ class TaylorExpansion:
             # But we have x^i not n^i, so: x_a^i * x^i = dot(xa, n) * r
             # Actually, we need to be more careful here
             # Let's expand x^i = n^i * r
-            result = result.replace(self.tc.x(i), self.n(i) * self.r0)
-            result = result.expand()
-            result = self.tc.contract_indices(result)
-            result = self.tc.contract_indices(result)
+            result = result.replace_multiple([self._x_to_nr])
+            result = _expand_if_needed(result)
+            result = self.tc.contract_to_fixpoint(result)
 
         return result
 
@@ -99,8 +212,8 @@ class TaylorExpansion:
 
         Result: (3(x_a·n)² - x_a²) / (2r³)
         """
-        # Create indices
-        i, j = S("i"), S("j")
+        # Indices
+        i, j = _I, _J
 
         # x_a^i * x_a^j
         xa_product = self.xa(i) * self.xa(j)
@@ -109,20 +222,17 @@ class TaylorExpansion:
         deriv = self.de.second_derivative_1_over_r(i, j)
 
         # (1/2) * x_a^i * x_a^j * deriv
-        result = Expression.num(1) / 2 * xa_product * deriv
+        result = self._half * xa_product * deriv
 
         if use_contraction:
             # Replace x^i with n^i * r
-            result = result.replace(self.tc.x(i), self.n(i) * self.r0)
-            result = result.replace(self.tc.x(j), self.n(j) * self.r0)
+            result = result.replace_multiple([self._x_to_nr])
 
-            # Expand to distribute products
-            result = result.expand()
+            # Expand to distribute products (skipped for a single product)
+            result = _expand_if_needed(result)
 
-            # Contract indices (multiple passes for complete contraction)
-            result = self.tc.contract_indices(result)
-            result = self.tc.contract_indices(result)
-            result = self.tc.contract_indices(result)
+            # Contract indices until nothing changes
+            result = self.tc.contract_to_fixpoint(result)
 
         return result
 
@@ -135,13 +245,12 @@ class TaylorExpansion:
         2. Compute the n-th derivative
         3. Contract all repeated indices
         """
-        # Create n different indices
-        indices = [S(f"i{k}") for k in range(1, n + 1)]
+        # n different indices
+        indices = list(_default_indices(n))
 
-        # Create x_a^{i₁} * ... * x_a^{iₙ}
-        xa_product = Expression.num(1)
-        for idx in indices:
-            xa_product = xa_product * self.xa(idx)
+        # Create x_a^{i₁} * ... * x_a^{iₙ} in one balanced fold, with no
+        # identity factor to seed it
+        xa_product = _balanced_product([self.xa(idx) for idx in indices])
 
         # Compute n-th derivative (if implemented)
         try:
@@ -151,34 +260,33 @@ class TaylorExpansion:
             deriv_sym = S("deriv_n")
             return Expression.parse(f"((-1)^{n} / {n}!) * xa_product * deriv_{n}")
 
-        # Sign and factorial
-        sign = (-1) ** n
-        factorial = self._factorial(n)
+        # Sign and factorial, folded into one cached rational literal
+        coeff = _COEFF.get(n)
+        if coeff is None:
+            coeff = _COEFF[n] = Expression.num((-1) ** n) / self._factorial(n)
 
-        result = Expression.num(sign) / factorial * xa_product * deriv
+        result = coeff * xa_product * deriv
 
         if use_contraction:
-            # Replace x^i with n^i * r for all indices
-            for idx in indices:
-                result = result.replace(self.tc.x(idx), self.n(idx) * self.r0)
+            # Replace x^i with n^i * r for all indices in one pass
+            result = result.replace_multiple([self._x_to_nr])
 
-            # Expand and contract multiple times
-            result = result.expand()
-            for _ in range(5):  # More passes for higher orders
-                result = self.tc.contract_indices(result)
+            # Expand and contract until nothing changes
+            result = _expand_if_needed(result)
+            result = self.tc.contract_to_fixpoint(result)
 
         return result
 
     def _factorial(self, n):
-        """Compute factorial."""
+        """Compute factorial by table lookup (see _FACT)."""
         if n <= 0:
             return 1
-        result = 1
-        for i in range(1, n + 1):
-            result *= i
-        return result
+        # Extend the shared table iteratively: k! = k * (k-1)!
+        while len(_FACT) <= n:
+            _FACT.append(_FACT[-1] * len(_FACT))
+        return _FACT[n]
 
-    def multipole_series(self, max_order=3):
+    def multipole_series(self, max_order=3, verbose=False):
         """
         Compute the multipole series up to a given order.
 
@@ -186,20 +294,24 @@ class TaylorExpansion:
 
         Args:
             max_order: Maximum order to compute
+            verbose: Print every term (formatting large orders is costly)
 
         Returns:
             Sum of all terms up to max_order
         """
-        result = Expression.num(0)
+        # Collect the terms and add them in one balanced fold, with no zero
+        # to seed the sum
+        terms = []
         for n in range(max_order + 1):
             try:
                 phi_n = self.phi_n(n, use_contraction=True)
-                result = result + phi_n
-                print(f"φ^({n}) = {phi_n}")
+                terms.append(phi_n)
+                if verbose:
+                    print(f"φ^({n}) = {phi_n}")
             except Exception as e:
                 print(f"Warning: Could not compute order {n}: {e}")
                 break
-        return result
+        return _balanced_sum(terms)
 
 
 def compare_to_exact(taylor_approx, num_terms):
@@ -244,6 +356,6 @@ if __name__ == "__main__":
     # Full series
     print("=" * 60)
     print("Full multipole series (up to n=2):")
-    series = te.multipole_series(max_order=2)
+    series = te.multipole_series(max_order=2, verbose=True)
     print(f"\nTotal: {series}")
     print()
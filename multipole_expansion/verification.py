@@ -7,11 +7,20 @@ This module verifies the key properties of the multipole expansion:
 3. The Taylor expansion and Q tensor formulations give the same φ^(n)
 """
 
-from symbolica import Expression, S
+from symbolica import Expression, Replacement, S
 from .taylor_expansion import TaylorExpansion
 from .multipole_moments import MultipoleMoments
-from .contraction import TensorContraction
+from .contraction import _ZERO, _default_indices, get_default_tc
+import io
 import itertools
+import sys
+
+# Index symbol of the traced pair in verify_Q_traceless
+_TRACE_INDEX = S("i")
+
+# Printed label of each index symbol (i3 -> "3"), seeded with the shared
+# default indices and extended by _format_indices for any other symbol
+_LABEL = {idx: str(k) for k, idx in enumerate(_default_indices(32), 1)}
 
 
 class Verifier:
@@ -19,13 +28,18 @@ class Verifier:
     Verification tools for multipole expansion properties.
     """
 
-    def __init__(self):
-        """Initialize all necessary engines."""
-        self.te = TaylorExpansion()
-        self.mm = MultipoleMoments()
-        self.tc = TensorContraction()
+    def __init__(self, tc=None):
+        """
+        Initialize all necessary engines.
 
-    def verify_Q_symmetry(self, n, verbose=True):
+        Args:
+            tc: TensorContraction shared by all engines (default if None)
+        """
+        self.tc = tc if tc is not None else get_default_tc()
+        self.te = TaylorExpansion(self.tc)
+        self.mm = MultipoleMoments(self.tc)
+
+    def verify_Q_symmetry(self, n, verbose=True, Q=None, file=None):
         """
         Verify that Q^{i₁...iₙ} is symmetric.
 
@@ -35,40 +49,42 @@ class Verifier:
         Args:
             n: Order of multipole
             verbose: Print detailed results
+            Q: Q^{i₁...iₙ} on the default indices, if already built
+            file: Stream for the verbose printout (default: sys.stdout)
 
         Returns:
             True if symmetric, False otherwise
         """
         if n == 0:
             if verbose:
-                print(f"n={n}: Monopole is trivially symmetric (scalar)")
+                print(f"n={n}: Monopole is trivially symmetric (scalar)", file=file)
             return True
 
         if n == 1:
             if verbose:
-                print(f"n={n}: Dipole is trivially symmetric (vector)")
+                print(f"n={n}: Dipole is trivially symmetric (vector)", file=file)
             return True
 
-        # Create distinct index symbols
-        indices = [S(f"i{k}") for k in range(1, n + 1)]
+        # Distinct index symbols
+        indices = list(_default_indices(n))
 
         # Get Q tensor with these indices
-        Q_original = self.mm.Q_tensor(n, indices)
+        Q_original = Q if Q is not None else self.mm.Q_tensor(n, indices)
 
         if verbose:
-            print(f"\nn={n}: Checking symmetry of Q tensor")
-            print(f"Q^{{{self._format_indices(indices)}}} = {Q_original}")
-            print()
+            print(f"\nn={n}: Checking symmetry of Q tensor", file=file)
+            print(f"Q^{{{self._format_indices(indices)}}} = {Q_original}", file=file)
+            print(file=file)
 
         # For n=2, explicitly check i,j vs j,i
         if n == 2:
             i, j = indices
-            Q_ij = self.mm.Q_tensor(2, [i, j])
-            Q_ji = self.mm.Q_tensor(2, [j, i])
+            Q_ij = Q_original
+            Q_ji = Q_original.replace_multiple([Replacement(i, j), Replacement(j, i)])
 
             if verbose:
-                print(f"Q^{{ij}} = {Q_ij}")
-                print(f"Q^{{ji}} = {Q_ji}")
+                print(f"Q^{{ij}} = {Q_ij}", file=file)
+                print(f"Q^{{ji}} = {Q_ji}", file=file)
 
             # Symbolically, these should be the same
             # The expressions 3*xa(i)*xa(j) - delta(i,j)*ra0^2
@@ -77,11 +93,15 @@ class Verifier:
             # and delta(i,j) = delta(j,i) (symmetric)
 
             if verbose:
-                print("✓ Quadrupole is symmetric (delta and products are symmetric)")
+                print(
+                    "✓ Quadrupole is symmetric (delta and products are symmetric)",
+                    file=file,
+                )
             return True
 
         if n == 3:
-            # Check that different orderings give the same expression
+            # Rename the indices of the one Q build instead of recomputing
+            # Q for every permutation
             i, j, k = indices
 
             perms_to_check = [
@@ -91,20 +111,36 @@ class Verifier:
             ]
 
             if verbose:
-                print("Checking permutations:")
+                print("Checking permutations:", file=file)
 
+            Q_ref = self.tc.symmetrize_deltas(Q_original)
+            is_symmetric = True
             for perm_indices, label in perms_to_check:
-                Q_perm = self.mm.Q_tensor(3, perm_indices)
+                Q_perm = Q_original.replace_multiple(
+                    [Replacement(a, b) for a, b in zip(indices, perm_indices)]
+                )
                 if verbose:
-                    print(f"  Q^{{{label}}} = {Q_perm}")
+                    print(f"  Q^{{{label}}} = {Q_perm}", file=file)
+                is_symmetric = is_symmetric and self._check_if_zero(
+                    self.tc.symmetrize_deltas(Q_perm) - Q_ref
+                )
 
             if verbose:
-                print("✓ Octupole is symmetric (all permutations equivalent)")
-            return True
-
+                if is_symmetric:
+                    print(
+                        "✓ Octupole is symmetric (all permutations equivalent)",
+                        file=file,
+                    )
+                else:
+                    print("✗ Warning: Octupole permutations differ", file=file)
+            return is_symmetric
+
+        # Q_tensor is symmetric by construction for any n: the main term is
+        # a product of commuting factors and the trace terms run over all
+        # pairings, so no permutation needs to be rebuilt
         return True
 
-    def verify_Q_traceless(self, n, verbose=True):
+    def verify_Q_traceless(self, n, verbose=True, Q=None, file=None):
         """
         Verify that Q^{i₁...iₙ} is traceless.
 
@@ -113,32 +149,41 @@ class Verifier:
         Args:
             n: Order of multipole
             verbose: Print detailed results
+            Q: Q^{i₁...iₙ} on the default indices, if already built; its
+                first two indices are then renamed instead of rebuilding Q
+            file: Stream for the verbose printout (default: sys.stdout)
 
         Returns:
             True if traceless, False otherwise
         """
         if n < 2:
             if verbose:
-                print(f"n={n}: Traceless property only applies for n >= 2")
+                print(f"n={n}: Traceless property only applies for n >= 2", file=file)
             return True
 
         if verbose:
-            print(f"\nn={n}: Checking traceless property")
+            print(f"\nn={n}: Checking traceless property", file=file)
 
         # Create indices where first two are the same
-        indices = [S("i")] * 2 + [S(f"i{k}") for k in range(3, n + 1)]
+        indices = [_TRACE_INDEX] * 2 + list(_default_indices(n)[2:])
 
         # Compute Q with contracted indices
-        Q_trace = self.mm.Q_tensor(n, indices)
+        if Q is not None:
+            i1, i2 = _default_indices(n)[:2]
+            Q_trace = Q.replace_multiple(
+                [Replacement(i1, _TRACE_INDEX), Replacement(i2, _TRACE_INDEX)]
+            )
+        else:
+            Q_trace = self.mm.Q_tensor(n, indices)
 
         if verbose:
-            print(f"Q^{{{self._format_indices(indices)}}} = {Q_trace}")
+            print(f"Q^{{{self._format_indices(indices)}}} = {Q_trace}", file=file)
 
         # Apply contraction (this should give 0)
         result = self.tc.contract_indices(Q_trace)
 
         if verbose:
-            print(f"After contraction: {result}")
+            print(f"After contraction: {result}", file=file)
 
         # Check if result simplifies to 0
         # For n=2: 3*xa(i)*xa(i) - delta(i,i)*ra0^2
@@ -151,13 +196,15 @@ class Verifier:
 
         if verbose:
             if is_zero:
-                print("✓ Traceless property verified")
+                print("✓ Traceless property verified", file=file)
             else:
-                print(f"✗ Warning: Trace = {result_expanded} (expected 0)")
+                print(f"✗ Warning: Trace = {result_expanded} (expected 0)", file=file)
 
         return is_zero
 
-    def verify_equivalence(self, n, verbose=True):
+    def verify_equivalence(
+        self, n, verbose=True, phi_taylor=None, phi_Q=None, file=None
+    ):
         """
         Verify that the Taylor expansion and Q tensor formulations agree.
 
@@ -168,50 +215,52 @@ class Verifier:
         Args:
             n: Order of multipole
             verbose: Print detailed comparison
+            phi_taylor: φ^(n) from the Taylor expansion, if already built
+            phi_Q: φ^(n) from the Q tensor, if already built
+            file: Stream for the verbose printout (default: sys.stdout)
 
         Returns:
             True if equivalent, False otherwise
         """
         if verbose:
-            print(f"\nn={n}: Verifying equivalence of formulations")
-            print("=" * 60)
+            print(f"\nn={n}: Verifying equivalence of formulations", file=file)
+            print("=" * 60, file=file)
 
         # Compute φ^(n) from Taylor expansion
-        phi_taylor = self.te.phi_n(n, use_contraction=True)
+        if phi_taylor is None:
+            phi_taylor = self.te.phi_n(n, use_contraction=True)
 
         # Compute φ^(n) from Q tensor
-        phi_Q = self.mm.phi_from_Q(n)
+        if phi_Q is None:
+            phi_Q = self.mm.phi_from_Q(n)
 
         if verbose:
-            print(f"φ^({n}) from Taylor expansion:")
-            print(f"  {phi_taylor}")
-            print()
-            print(f"φ^({n}) from Q tensor formulation:")
-            print(f"  {phi_Q}")
-            print()
-
-        # Apply contraction multiple times to ensure complete contraction
+            print(f"φ^({n}) from Taylor expansion:", file=file)
+            print(f"  {phi_taylor}", file=file)
+            print(file=file)
+            print(f"φ^({n}) from Q tensor formulation:", file=file)
+            print(f"  {phi_Q}", file=file)
+            print(file=file)
+
+        # Contract until nothing changes to ensure complete contraction
         # (some indices may only be contractable after first pass)
-        phi_taylor_contracted = self.tc.contract_indices(phi_taylor)
-        phi_taylor_contracted = self.tc.contract_indices(phi_taylor_contracted)
-
-        phi_Q_contracted = self.tc.contract_indices(phi_Q)
-        phi_Q_contracted = self.tc.contract_indices(phi_Q_contracted)
+        phi_taylor_contracted = self.tc.contract_to_fixpoint(phi_taylor)
+        phi_Q_contracted = self.tc.contract_to_fixpoint(phi_Q)
 
         # Compare by expanding and simplifying
         diff = (phi_taylor_contracted - phi_Q_contracted).expand()
 
         if verbose:
-            print(f"Difference (should be 0):")
-            print(f"  {diff}")
+            print(f"Difference (should be 0):", file=file)
+            print(f"  {diff}", file=file)
 
         is_equivalent = self._check_if_zero(diff)
 
         if verbose:
             if is_equivalent:
-                print("✓ Formulations are equivalent")
+                print("✓ Formulations are equivalent", file=file)
             else:
-                print("✗ Warning: Formulations may differ")
+                print("✗ Warning: Formulations may differ", file=file)
 
         return is_equivalent
 
@@ -219,6 +268,10 @@ class Verifier:
         """
         Run all verification tests up to max_order.
 
+        Q^{i₁...iₙ} and both forms of φ^(n) are built once per order and
+        shared by the checks. A build that fails is left to the check using
+        it, which rebuilds and reports the error.
+
         Args:
             max_order: Maximum multipole order to verify
         """
@@ -227,59 +280,71 @@ class Verifier:
         print("=" * 70)
 
         for n in range(max_order + 1):
-            print(f"\n{'=' * 70}")
-            print(f"ORDER n = {n}")
-            print(f"{'=' * 70}")
+            # Collect the report of this order and write it in one call
+            buf = io.StringIO()
+            print(f"\n{'=' * 70}", file=buf)
+            print(f"ORDER n = {n}", file=buf)
+            print(f"{'=' * 70}", file=buf)
+
+            Q = self._try_build(self.mm.Q_tensor, n, list(_default_indices(n)))
+            phi_taylor = self._try_build(self.te.phi_n, n, use_contraction=True)
+            phi_Q = self._try_build(self.mm.phi_from_Q, n)
 
             # Test 1: Symmetry
             try:
-                self.verify_Q_symmetry(n, verbose=True)
+                self.verify_Q_symmetry(n, verbose=True, Q=Q, file=buf)
             except Exception as e:
-                print(f"Error in symmetry test: {e}")
+                print(f"Error in symmetry test: {e}", file=buf)
 
             # Test 2: Traceless
             try:
-                self.verify_Q_traceless(n, verbose=True)
+                self.verify_Q_traceless(n, verbose=True, Q=Q, file=buf)
             except Exception as e:
-                print(f"Error in traceless test: {e}")
+                print(f"Error in traceless test: {e}", file=buf)
 
             # Test 3: Equivalence
             try:
-                self.verify_equivalence(n, verbose=True)
+                self.verify_equivalence(
+                    n, verbose=True, phi_taylor=phi_taylor, phi_Q=phi_Q, file=buf
+                )
             except Exception as e:
-                print(f"Error in equivalence test: {e}")
+                print(f"Error in equivalence test: {e}", file=buf)
+
+            sys.stdout.write(buf.getvalue())
 
         print(f"\n{'=' * 70}")
         print("VERIFICATION COMPLETE")
         print(f"{'=' * 70}")
 
+    @staticmethod
+    def _try_build(build, *args, **kwargs):
+        """Return build(*args, **kwargs), or None if it raises."""
+        try:
+            return build(*args, **kwargs)
+        except Exception:
+            return None
+
     def _format_indices(self, indices):
         """Format list of indices for printing."""
-        return "".join(
-            str(idx).replace("i", "") if str(idx).startswith("i") else str(idx)
-            for idx in indices
-        )
+        labels = []
+        for idx in indices:
+            label = _LABEL.get(idx)
+            if label is None:
+                name = str(idx)
+                label = _LABEL[idx] = (
+                    name.replace("i", "") if name.startswith("i") else name
+                )
+            labels.append(label)
+        return "".join(labels)
 
     def _check_if_zero(self, expr):
         """
-        Check if a Symbolica expression is zero (or very close to it).
+        Check if a Symbolica expression is zero.
 
-        This is heuristic since we're working symbolically.
+        The expression is expanded to its canonical form, in which any
+        vanishing expression is exactly the number 0.
         """
-        # Convert to string and check
-        expr_str = str(expr)
-
-        # If it's literally "0", it's zero
-        if expr_str == "0" or expr_str == "0.":
-            return True
-
-        # If it's empty or very short, might be zero
-        if len(expr_str) < 3:
-            return True
-
-        # Otherwise, we'd need more sophisticated checking
-        # For now, assume it's not zero if we get here
-        return False
+        return bool(expr.expand() == _ZERO)
 
 
 if __name__ == "__main__":
@@ -6,12 +6,24 @@ This script demonstrates that the recursive algorithm can compute
 multipole moments to arbitrary order.
 """
 
+import io
+import math
 import os
+import re
+import sys
 
+# Set before anything imports Symbolica. The package itself is imported
+# inside the tests, so a test that does not need it starts without it.
 os.environ["SYMBOLICA_HIDE_BANNER"] = "1"
 
-from symbolica import S
-from multipole_expansion import MultipoleExpansion, MultipoleMoments, TensorContraction
+# Term separators of a formatted expression, counted in one scan
+_SIGN = re.compile(r"[+-]")
+
+
+def _has_all(text, parts):
+    """True if every string of parts occurs in text, in one regex scan."""
+    pattern = re.compile("|".join(map(re.escape, parts)))
+    return set(pattern.findall(text)) >= set(parts)
 
 
 def test_can_compute_high_orders():
@@ -22,6 +34,8 @@ def test_can_compute_high_orders():
     print("\nThe recursive algorithm can compute Q^{i₁...iₙ} for ANY n!")
     print()
 
+    from multipole_expansion import MultipoleMoments
+
     mm = MultipoleMoments()
 
     orders = {
@@ -36,47 +50,53 @@ def test_can_compute_high_orders():
     }
 
     for n in range(8):
+        # Collect the report of this order and write it in one call
+        buf = io.StringIO()
         name = orders.get(n, f"2^{n}-pole")
-        print(f"\n{'=' * 70}")
-        print(f"n={n} ({name})")
-        print("=" * 70)
+        print(f"\n{'=' * 70}", file=buf)
+        print(f"n={n} ({name})", file=buf)
+        print("=" * 70, file=buf)
 
         try:
             # Compute Q tensor
             Q = mm.Q_tensor(n)
 
+            # Format once, for both the term count and the printout.
+            # Use max_terms for n>=6 to avoid truncation in large expressions
+            if n >= 6:
+                Q_str = Q.format(terms_on_new_line=True, max_terms=10000)
+            else:
+                Q_str = Q.format(terms_on_new_line=True)
+
             # Count terms (roughly)
-            Q_str = str(Q)
-            num_plus = Q_str.count("+")
-            num_minus = Q_str.count("-")
-            num_terms_approx = num_plus + num_minus + 1
+            num_terms_approx = len(_SIGN.findall(Q_str)) + 1
 
-            print(f"✓ Q^{{i₁...i{n}}} computed successfully")
-            print(f"Term count: {num_terms_approx}")
+            print(f"✓ Q^{{i₁...i{n}}} computed successfully", file=buf)
+            print(f"Term count: {num_terms_approx}", file=buf)
 
             # Verify main coefficient is 2n-1 double factorial
             expected_main_coeff = mm._double_factorial(2 * n - 1)
-            print()
+            print(file=buf)
             print(
-                f"Main coefficient expected from (2n-1)!! is \n    {expected_main_coeff}"
+                f"Main coefficient expected from (2n-1)!! is \n    {expected_main_coeff}",
+                file=buf,
             )
-            print("(Find this in the last term in the full formula string.)")
+            print("(Find this in the last term in the full formula string.)", file=buf)
 
             # SHOW FULL FORMULA for ALL n (especially n>3)
-            print(f"\nFull Formula:")
-            print("-" * 70)
-            # Use max_terms for n>=6 to avoid truncation in large expressions
-            if n >= 6:
-                print(Q.format(terms_on_new_line=True, max_terms=10000))
-            else:
-                print(Q.format(terms_on_new_line=True))
-            print("-" * 70)
+            print(f"\nFull Formula:", file=buf)
+            print("-" * 70, file=buf)
+            print(Q_str, file=buf)
+            print("-" * 70, file=buf)
 
         except Exception as e:
-            print(f"✗ Failed: {e}")
+            print(f"✗ Failed: {e}", file=buf)
             import traceback
 
-            traceback.print_exc()
+            traceback.print_exc(file=buf)
+
+        finally:
+            sys.stdout.write(buf.getvalue())
 
     return True
 
@@ -107,6 +127,97 @@ def test_pattern_in_coefficients():
     return True
 
 
+def test_pairings_unique():
+    """Test that the k-pairings of n indices are generated exactly once."""
+    print("\n" + "=" * 70)
+    print("UNIQUENESS OF INDEX PAIRINGS")
+    print("=" * 70)
+    print()
+
+    from multipole_expansion import MultipoleMoments
+
+    mm = MultipoleMoments()
+
+    for n in range(9):
+        for k in range(n // 2 + 1):
+            pairings = mm._generate_k_pairings(n, k)
+            normalized = {tuple(sorted(pairing)) for pairing in pairings}
+            assert len(normalized) == len(pairings), (n, k)
+
+            # C(n, 2k) * (2k-1)!! distinct pairings
+            expected = math.comb(n, 2 * k) * mm._double_factorial(2 * k - 1)
+            assert len(pairings) == expected, (n, k)
+
+        print(f"  n={n}: all pairings distinct ✓")
+
+    return True
+
+
+def test_Q_symmetric():
+    """Test that Q tensors are symmetric under swaps of their indices."""
+    print("\n" + "=" * 70)
+    print("SYMMETRY OF Q TENSORS")
+    print("=" * 70)
+    print()
+
+    from symbolica import S
+    from multipole_expansion import MultipoleMoments
+    from multipole_expansion.multipole_moments import verify_symmetry
+
+    mm = MultipoleMoments()
+
+    for n in range(2, 8):
+        indices = [S(f"i{k}") for k in range(1, n + 1)]
+        Q = mm.Q_tensor(n, indices)
+        assert verify_symmetry(Q, indices, mm.tc), n
+        print(f"  n={n}: symmetric ✓")
+
+    # A tensor that is not symmetric must be rejected
+    i, j, k = S("i"), S("j"), S("k")
+    assert not verify_symmetry(mm.xa(i) * mm.delta(j, k), [i, j, k], mm.tc)
+
+    return True
+
+
+def test_index_count_checked():
+    """Test that a wrong number of indices is rejected, not half-renamed."""
+    print("\n" + "=" * 70)
+    print("INDEX COUNT CHECKS")
+    print("=" * 70)
+    print()
+
+    from symbolica import S
+    from multipole_expansion import DerivativeEngine, MultipoleMoments
+
+    de = DerivativeEngine()
+    mm = MultipoleMoments()
+    i, j = S("i"), S("j")
+
+    for n, indices in [(3, [i, j]), (1, [i, j])]:
+        try:
+            de.nth_derivative_1_over_r(n, indices)
+        except ValueError as e:
+            print(f"  ∂^{n}(1/r) with {len(indices)} indices: rejected ✓ ({e})")
+        else:
+            raise AssertionError(f"∂^{n}(1/r) accepted {len(indices)} indices")
+
+    for build in (mm.Q_tensor, mm.phi_from_Q):
+        for n, indices in [(3, [i, j]), (1, [i, j])]:
+            try:
+                build(n, indices)
+            except ValueError:
+                print(
+                    f"  {build.__name__}({n}) with {len(indices)} indices: rejected ✓"
+                )
+            else:
+                raise AssertionError(f"{build.__name__}({n}) accepted {indices}")
+
+    # Nothing was cached for the rejected calls
+    assert all(len(key[1]) == key[0] for key in mm._q_cache)
+
+    return True
+
+
 def demonstrate_phi_from_Q():
     """Demonstrate computing φ^(n) using Taylor expansion for high n."""
     print("\n" + "=" * 70)
@@ -117,14 +228,15 @@ def demonstrate_phi_from_Q():
     print("and works for arbitrary n:")
     print()
 
+    from multipole_expansion import MultipoleExpansion
+
     mp = MultipoleExpansion()
 
     for n in range(6):
         try:
             phi_n = mp.taylor_term(n)
 
-            # Check power of r
-            phi_str = str(phi_n)
+            # Power of r expected in φ^(n); nothing needs formatting for it
             expected_power = n + 1
 
             print(f"φ^({n}) (via Taylor): ✓ Computed, contains 1/r^{expected_power}")
@@ -155,37 +267,40 @@ def verify_low_orders_unchanged():
     print("Ensuring recursive algorithm didn't break n=0,1,2:")
     print()
 
+    from symbolica import S
+    from multipole_expansion import MultipoleMoments, TensorContraction
+
     mm = MultipoleMoments()
     tc = TensorContraction()
 
     # n=2
     i, j = S("i"), S("j")
     Q_2 = mm.Q_tensor(2, [i, j])
-    print(f"Q^{{ij}} (n=2) = {Q_2.format(terms_on_new_line=True)}")
+    Q2_str = Q_2.format(terms_on_new_line=True)
+    print(f"Q^{{ij}} (n=2) = {Q2_str}")
 
     # Expected: 3*xa(i)*xa(j) - delta(i,j)*ra0^2
     expected_has = ["3*xa", "delta", "ra0"]
-    Q2_str = str(Q_2)
 
-    all_present = all(comp in Q2_str for comp in expected_has)
+    all_present = _has_all(Q2_str, expected_has)
     print(f"  Has expected components: {'✓' if all_present else '✗'}")
 
     # Check traceless
     Q_2_trace = mm.Q_tensor(2, [i, i])
     result = tc.contract_indices(Q_2_trace)
     result = tc.contract_indices(result)
-    is_zero = str(result) == "0"
+    is_zero = bool(result.expand() == 0)
     print(f"  Q^{{ii}} = {result}")
     print(f"  Traceless: {'✓' if is_zero else '✗'}")
 
     # n=3
     k = S("k")
     Q_3 = mm.Q_tensor(3, [i, j, k])
-    print(f"\nQ^{{ijk}} (n=3) = {Q_3.format(terms_on_new_line=True)}")
+    Q3_str = Q_3.format(terms_on_new_line=True)
+    print(f"\nQ^{{ijk}} (n=3) = {Q3_str}")
 
     expected_has_3 = ["5*xa", "delta", "ra0"]
-    Q3_str = str(Q_3)
-    all_present_3 = all(comp in Q3_str for comp in expected_has_3)
+    all_present_3 = _has_all(Q3_str, expected_has_3)
     print(f"  Has expected components: {'✓' if all_present_3 else '✗'}")
 
     print()
@@ -206,6 +321,9 @@ def main():
 
     tests = [
         ("High Order Computation", test_can_compute_high_orders),
+        ("Pairings Unique", test_pairings_unique),
+        ("Q Symmetric", test_Q_symmetric),
+        ("Index Count Checked", test_index_count_checked),
         # ("Coefficient Pattern", test_pattern_in_coefficients),
         ("Phi from Q (High Orders)", demonstrate_phi_from_Q),
         ("Low Orders Unchanged", verify_low_orders_unchanged),
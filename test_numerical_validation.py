@@ -6,13 +6,82 @@ This script validates the multipole expansion by comparing symbolic results
 with explicit numerical test cases.
 """
 
+import contextlib
+import io
 import os
+import sys
+import traceback
 
 os.environ["SYMBOLICA_HIDE_BANNER"] = "1"
 
 from symbolica import S, Expression
 from multipole_expansion import MultipoleExpansion
+import functools
 import math
+from typing import List, NamedTuple, Tuple
+
+try:
+    from numba import njit as _numba_njit
+except ImportError:  # numba is optional; the kernel then runs as plain Python
+    _numba_njit = None
+
+
+def _njit(fn):
+    """Compile fn with numba when it is installed, else return it unchanged."""
+    if _numba_njit is None:
+        return fn
+    return _numba_njit(cache=True)(fn)
+
+
+# One expansion shared by all tests
+_MP = MultipoleExpansion()
+
+
+@functools.lru_cache(maxsize=None)
+def _taylor(n):
+    """φ^(n) of the shared expansion, built once per order."""
+    return _MP.taylor_term(n)
+
+
+@functools.lru_cache(maxsize=None)
+def _taylor_str(n):
+    """str(φ^(n)), serialized once per order."""
+    return str(_taylor(n))
+
+
+@functools.lru_cache(maxsize=None)
+def _q2_trace():
+    """Q^{ii} and its contraction, built once on the shared engines."""
+    Q_trace = _MP.mm.Q_tensor(2, [S("i"), S("i")])
+    return Q_trace, _MP.tc.contract_indices(Q_trace)
+
+
+# Scalar parameter standing in for dot(xa, n) in numerical evaluation
+_DOT = S("mpe_dot_xa_n")
+
+
+@functools.lru_cache(maxsize=None)
+def _numeric_form(expr):
+    """
+    expr with dot(xa, n) replaced by _DOT, ready for expr.evaluate.
+
+    The result is factored, so that subterms shared by all terms (the
+    r0^-(n+1) power and common coefficients) are evaluated only once.
+    """
+    tc = _MP.tc
+    return expr.replace(tc.dot(tc.xa, tc.n), _DOT).factor()
+
+
+def assert_close(value, expected, tol=1e-12):
+    """Assert that a numerical result matches its reference value."""
+    assert abs(value - expected) <= tol * max(1.0, abs(expected)), (value, expected)
+
+
+def assert_all_close(values, expected, tol=1e-12):
+    """Assert elementwise closeness of a batch of results to its references."""
+    assert len(values) == len(expected), (values, expected)
+    for value, reference in zip(values, expected):
+        assert_close(value, reference, tol)
 
 
 def print_header(title):
@@ -21,63 +90,121 @@ def print_header(title):
     print("=" * 70 + "\n")
 
 
-def substitute_and_evaluate(expr, xa_val, x_val):
+@_njit
+def _point_geometry(xax, xay, xaz, xx, xy, xz):
+    """
+    |xa|, r0, n, xa·n and (xa·n)² of one test point, as a flat float tuple.
+
+    The sums are unrolled over the three components so that the kernel
+    stays a straight-line float routine, which numba can compile when it
+    is available.
+    """
+    ra0 = math.sqrt(xax * xax + xay * xay + xaz * xaz)
+    r0 = math.sqrt(xx * xx + xy * xy + xz * xz)
+
+    if r0 == 0:
+        inf = math.inf
+        return ra0, r0, inf, inf, inf, inf, inf
+
+    # Unit vector and dot product
+    nx = xx / r0
+    ny = xy / r0
+    nz = xz / r0
+    dot = xax * nx + xay * ny + xaz * nz
+    return ra0, r0, nx, ny, nz, dot, dot * dot
+
+
+class Vals(NamedTuple):
+    """Derived quantities of one test point, and the value of φ there."""
+
+    ra0: float
+    r0: float
+    n: Tuple[float, float, float]
+    dot_xa_n: float
+    dot_xa_n_squared: float
+    phi: float
+
+
+class ValsBatch(NamedTuple):
+    """The fields of Vals for a batch of test points, one list per field."""
+
+    ra0: List[float]
+    r0: List[float]
+    n: List[Tuple[float, float, float]]
+    dot_xa_n: List[float]
+    dot_xa_n_squared: List[float]
+    phi: List[float]
+
+
+def substitute_and_evaluate(expr, xa_vals, x_vals):
     """
-    Substitute numerical values and evaluate.
+    Substitute numerical values and evaluate, for a batch of test points.
+
+    All points are evaluated in one call, so a test builds its cases once
+    and reads the results per case.
 
     Args:
         expr: Symbolica expression
-        xa_val: (xa_x, xa_y, xa_z) source position
-        x_val: (x_x, x_y, x_z) observation position
+        xa_vals: Sequence of (xa_x, xa_y, xa_z) source positions
+        x_vals: Sequence of (x_x, x_y, x_z) observation positions
 
     Returns:
-        Numerical result
+        ValsBatch, one entry per point (inf where r0 = 0); phi holds
+        the value of expr itself
     """
-    # This is a simplified version - full implementation would use
-    # Symbolica's evaluator
+    # Evaluate expr itself with Symbolica, on top of the derived quantities
+    vals = ValsBatch([], [], [], [], [], [])
+    tc = _MP.tc
+    numeric = _numeric_form(expr)
 
-    # Calculate derived quantities
-    ra0_val = math.sqrt(sum(c**2 for c in xa_val))
-    r0_val = math.sqrt(sum(c**2 for c in x_val))
+    for xa_val, x_val in zip(xa_vals, x_vals):
+        ra0_val, r0_val, nx, ny, nz, dot_xa_n, dot_xa_n_squared = _point_geometry(
+            *xa_val, *x_val
+        )
+        n_val = (nx, ny, nz)
 
-    if r0_val == 0:
-        return float("inf")
+        vals.ra0.append(ra0_val)
+        vals.r0.append(r0_val)
+        vals.n.append(n_val)
+        vals.dot_xa_n.append(dot_xa_n)
+        vals.dot_xa_n_squared.append(dot_xa_n_squared)
+        vals.phi.append(
+            numeric.evaluate({tc.r0: r0_val, tc.ra0: ra0_val, _DOT: dot_xa_n}, {})
+            if r0_val != 0
+            else float("inf")
+        )
 
-    # Unit vector
-    n_val = tuple(c / r0_val for c in x_val)
+    return vals
 
-    # Dot product
-    dot_xa_n = sum(xa_val[i] * n_val[i] for i in range(3))
 
-    return {
-        "ra0": ra0_val,
-        "r0": r0_val,
-        "n": n_val,
-        "dot_xa_n": dot_xa_n,
-        "dot_xa_n_squared": dot_xa_n**2,
-    }
+def _case(vals, k):
+    """Vals of the k-th point of a substitute_and_evaluate ValsBatch."""
+    return Vals(*(column[k] for column in vals))
 
 
 def test_monopole_numerical():
     """Test monopole with numerical values."""
     print_header("Monopole Numerical Test")
 
-    mp = MultipoleExpansion()
-    phi_0 = mp.taylor_term(0)
+    phi_0 = _taylor(0)
 
-    print(f"Formula: φ^(0) = {phi_0}")
+    print(f"Formula: φ^(0) = {_taylor_str(0)}")
     print("Expected: 1/r")
     print()
 
     # Test case: x = (0, 0, 10)
     x_val = (0, 0, 10)
-    r = math.sqrt(sum(c**2 for c in x_val))
+    r = math.hypot(*x_val)
 
     expected = 1 / r
     print(f"Test: x = {x_val}")
     print(f"  r = {r}")
     print(f"  Expected: 1/{r} = {expected}")
     print(f"  Formula gives: 1/r0 where r0 = {r}")
+
+    vals = _case(substitute_and_evaluate(phi_0, [(0, 0, 0)], [x_val]), 0)
+    print(f"  Symbolic φ^(0) evaluates to: {vals.phi}")
+    assert_close(vals.phi, expected)
     print(f"  ✓ Match!")
 
     return True
@@ -87,39 +214,50 @@ def test_dipole_numerical():
     """Test dipole with numerical values."""
     print_header("Dipole Numerical Test")
 
-    mp = MultipoleExpansion()
-    phi_1 = mp.taylor_term(1)
+    phi_1 = _taylor(1)
 
-    print(f"Formula: φ^(1) = {phi_1}")
+    print(f"Formula: φ^(1) = {_taylor_str(1)}")
     print("Expected: (xa · n)/r²")
     print()
 
+    # Both cases, evaluated in one batch:
+    # aligned (xa and x both along z) and perpendicular
+    xa_vals = [(0, 0, 1), (1, 0, 0)]
+    x_vals = [(0, 0, 10), (0, 0, 10)]
+    batch = substitute_and_evaluate(phi_1, xa_vals, x_vals)
+
+    # Compare the whole batch against (xa · n)/r² at once; the cases below
+    # only report
+    expected_arr = [d / r0**2 for d, r0 in zip(batch.dot_xa_n, batch.r0)]
+    assert_all_close(batch.phi, expected_arr)
+
     # Test case 1: Aligned (xa and x both along z)
     print("Test 1: Aligned dipole")
-    xa_val = (0, 0, 1)
-    x_val = (0, 0, 10)
+    xa_val, x_val = xa_vals[0], x_vals[0]
 
-    vals = substitute_and_evaluate(phi_1, xa_val, x_val)
-    expected = vals["dot_xa_n"] / vals["r0"] ** 2
+    vals = _case(batch, 0)
+    expected = expected_arr[0]
+    r2 = vals.r0**2
 
     print(f"  xa = {xa_val}, x = {x_val}")
-    print(f"  xa · n = {vals['dot_xa_n']}")
-    print(f"  r = {vals['r0']}")
-    print(f"  Expected: {vals['dot_xa_n']}/{vals['r0'] ** 2} = {expected}")
-    print(f"  ✓ Formula gives: dot(xa,n)/r0² = {vals['dot_xa_n']}/{vals['r0'] ** 2}")
+    print(f"  xa · n = {vals.dot_xa_n}")
+    print(f"  r = {vals.r0}")
+    print(f"  Expected: {vals.dot_xa_n}/{r2} = {expected}")
+    print(f"  ✓ Formula gives: dot(xa,n)/r0² = {vals.dot_xa_n}/{r2}")
+    print(f"  Symbolic φ^(1) evaluates to: {vals.phi}")
     print()
 
     # Test case 2: Perpendicular
     print("Test 2: Perpendicular dipole")
-    xa_val = (1, 0, 0)
-    x_val = (0, 0, 10)
+    xa_val, x_val = xa_vals[1], x_vals[1]
 
-    vals = substitute_and_evaluate(phi_1, xa_val, x_val)
-    expected = vals["dot_xa_n"] / vals["r0"] ** 2
+    vals = _case(batch, 1)
+    expected = expected_arr[1]
 
     print(f"  xa = {xa_val}, x = {x_val}")
-    print(f"  xa · n = {vals['dot_xa_n']} (perpendicular)")
+    print(f"  xa · n = {vals.dot_xa_n} (perpendicular)")
     print(f"  Expected: {expected}")
+    print(f"  Symbolic φ^(1) evaluates to: {vals.phi}")
     print(f"  ✓ Formula correctly gives 0 when perpendicular")
 
     return True
@@ -129,59 +267,77 @@ def test_quadrupole_numerical():
     """Test quadrupole with numerical values."""
     print_header("Quadrupole Numerical Test")
 
-    mp = MultipoleExpansion()
-    phi_2 = mp.taylor_term(2)
+    phi_2 = _taylor(2)
 
-    print(f"Formula: φ^(2) = {phi_2}")
+    print(f"Formula: φ^(2) = {_taylor_str(2)}")
     print("Expected: (3(xa·n)² - |xa|²)/(2r³)")
     print()
 
+    # Both cases, evaluated in one batch:
+    # aligned (xa and x both along z) and perpendicular
+    xa_vals = [(0, 0, 1), (1, 0, 0)]
+    x_vals = [(0, 0, 10), (0, 0, 10)]
+    batch = substitute_and_evaluate(phi_2, xa_vals, x_vals)
+
+    # Compare the whole batch against (3(xa·n)² - |xa|²)/(2r³) at once; the
+    # cases below only report
+    expected_arr = [
+        (3 * d2 - ra0**2) / (2 * r0**3)
+        for d2, ra0, r0 in zip(batch.dot_xa_n_squared, batch.ra0, batch.r0)
+    ]
+    assert_all_close(batch.phi, expected_arr)
+
+    # The printed formula, -1/2 |xa|²/r³ + 3/2 (xa·n)²/r³, for the whole
+    # batch; all its differences to the reference are checked at once
+    formula_arr = [
+        (-0.5 * ra0**2 + 1.5 * d2) / r0**3
+        for d2, ra0, r0 in zip(batch.dot_xa_n_squared, batch.ra0, batch.r0)
+    ]
+    diffs = [abs(e - f) for e, f in zip(expected_arr, formula_arr)]
+    assert max(diffs) < 1e-12, diffs
+
     # Test case 1: Aligned (xa and x both along z)
     print("Test 1: Aligned quadrupole")
-    xa_val = (0, 0, 1)
-    x_val = (0, 0, 10)
+    xa_val, x_val = xa_vals[0], x_vals[0]
 
-    vals = substitute_and_evaluate(phi_2, xa_val, x_val)
-    expected = (3 * vals["dot_xa_n_squared"] - vals["ra0"] ** 2) / (2 * vals["r0"] ** 3)
+    vals = _case(batch, 0)
+    expected = expected_arr[0]
+    # Powers used by several lines below, computed once
+    r3 = vals.r0**3
+    ra2 = vals.ra0**2
+    d2 = vals.dot_xa_n_squared
 
     print(f"  xa = {xa_val}, x = {x_val}")
-    print(f"  xa · n = {vals['dot_xa_n']}")
-    print(f"  (xa · n)² = {vals['dot_xa_n_squared']}")
-    print(f"  |xa|² = {vals['ra0'] ** 2}")
-    print(f"  r = {vals['r0']}")
-    print(
-        f"  Numerator: 3×{vals['dot_xa_n_squared']} - {vals['ra0'] ** 2} = {3 * vals['dot_xa_n_squared'] - vals['ra0'] ** 2}"
-    )
+    print(f"  xa · n = {vals.dot_xa_n}")
+    print(f"  (xa · n)² = {d2}")
+    print(f"  |xa|² = {ra2}")
+    print(f"  r = {vals.r0}")
+    print(f"  Numerator: 3×{d2} - {ra2} = {3 * d2 - ra2}")
     print(f"  Expected: {expected}")
 
     # From formula
-    formula_result = (-0.5 * vals["ra0"] ** 2 + 1.5 * vals["dot_xa_n_squared"]) / vals[
-        "r0"
-    ] ** 3
-    print(
-        f"  Formula: (-1/2×{vals['ra0'] ** 2} + 3/2×{vals['dot_xa_n_squared']}) / {vals['r0'] ** 3}"
-    )
+    formula_result = formula_arr[0]
+    print(f"  Formula: (-1/2×{ra2} + 3/2×{d2}) / {r3}")
     print(f"         = {formula_result}")
-    print(f"  ✓ Match! (difference = {abs(expected - formula_result):.2e})")
+    print(f"  Symbolic φ^(2) evaluates to: {vals.phi}")
+    print(f"  ✓ Match! (difference = {diffs[0]:.2e})")
     print()
 
     # Test case 2: Perpendicular
     print("Test 2: Perpendicular quadrupole")
-    xa_val = (1, 0, 0)
-    x_val = (0, 0, 10)
+    xa_val, x_val = xa_vals[1], x_vals[1]
 
-    vals = substitute_and_evaluate(phi_2, xa_val, x_val)
-    expected = (3 * vals["dot_xa_n_squared"] - vals["ra0"] ** 2) / (2 * vals["r0"] ** 3)
+    vals = _case(batch, 1)
+    expected = expected_arr[1]
 
     print(f"  xa = {xa_val}, x = {x_val}")
-    print(f"  xa · n = {vals['dot_xa_n']} (perpendicular)")
+    print(f"  xa · n = {vals.dot_xa_n} (perpendicular)")
     print(f"  Expected: (3×0 - 1)/(2×1000) = {expected}")
 
-    formula_result = (-0.5 * vals["ra0"] ** 2 + 1.5 * vals["dot_xa_n_squared"]) / vals[
-        "r0"
-    ] ** 3
+    formula_result = formula_arr[1]
     print(f"  Formula: {formula_result}")
-    print(f"  ✓ Match! (difference = {abs(expected - formula_result):.2e})")
+    print(f"  Symbolic φ^(2) evaluates to: {vals.phi}")
+    print(f"  ✓ Match! (difference = {diffs[1]:.2e})")
 
     return True
 
@@ -190,8 +346,6 @@ def test_higher_order_behavior():
     """Test that multipoles fall off correctly with distance."""
     print_header("Distance Dependence Test")
 
-    mp = MultipoleExpansion()
-
     print("Theoretical behavior:")
     print("  φ^(n) ~ 1/r^(n+1)")
     print()
@@ -201,9 +355,9 @@ def test_higher_order_behavior():
     print()
 
     # Check powers of r in formulas
-    phi_0 = str(mp.taylor_term(0))
-    phi_1 = str(mp.taylor_term(1))
-    phi_2 = str(mp.taylor_term(2))
+    phi_0 = _taylor_str(0)
+    phi_1 = _taylor_str(1)
+    phi_2 = _taylor_str(2)
 
     print("Actual formulas:")
     print(f"  φ^(0) = {phi_0}")
@@ -225,11 +379,6 @@ def test_q_tensor_properties_numerical():
     """Test Q tensor properties with specific values."""
     print_header("Q Tensor Properties - Numerical Check")
 
-    from multipole_expansion import MultipoleMoments, TensorContraction
-
-    mm = MultipoleMoments()
-    tc = TensorContraction()
-
     print("Testing: Q^{ij} = 3*xa(i)*xa(j) - delta(i,j)*ra0²")
     print()
 
@@ -245,9 +394,8 @@ def test_q_tensor_properties_numerical():
     print()
 
     # Verify trace is zero symbolically
-    i = S("i")
-    Q_trace = mm.Q_tensor(2, [i, i])
-    result = tc.contract_indices(Q_trace)
+    Q_trace, result = _q2_trace()
+    assert bool(result.expand() == 0), result
 
     print(f"Symbolic trace: Q^{{ii}} = {Q_trace}")
     print(f"After contraction: {result}")
@@ -256,6 +404,34 @@ def test_q_tensor_properties_numerical():
     return True
 
 
+_TESTS = [
+    ("Monopole Numerical", test_monopole_numerical),
+    ("Dipole Numerical", test_dipole_numerical),
+    ("Quadrupole Numerical", test_quadrupole_numerical),
+    ("Distance Dependence", test_higher_order_behavior),
+    ("Q Tensor Properties", test_q_tensor_properties_numerical),
+]
+
+
+def _run_test(name, test_func):
+    """
+    Run one test, capturing its report.
+
+    Returns:
+        Tuple (name, error, output, traceback): error and traceback are
+        strings, and None and "" if the test passed
+    """
+    # Collect the test's report and write it in one call
+    buf = io.StringIO()
+    error, tb_text = None, ""
+    try:
+        with contextlib.redirect_stdout(buf):
+            test_func()
+    except Exception as e:
+        error, tb_text = str(e), traceback.format_exc()
+    return name, error, buf.getvalue(), tb_text
+
+
 def main():
     """Run all numerical validation tests."""
 
@@ -267,59 +443,60 @@ def main():
     print("explicit numerical examples from electrodynamics.")
     print()
 
-    tests = [
-        ("Monopole Numerical", test_monopole_numerical),
-        ("Dipole Numerical", test_dipole_numerical),
-        ("Quadrupole Numerical", test_quadrupole_numerical),
-        ("Distance Dependence", test_higher_order_behavior),
-        ("Q Tensor Properties", test_q_tensor_properties_numerical),
-    ]
+    # Build the terms every test uses up front
+    for n in range(3):
+        _taylor(n)
+    _q2_trace()
 
-    results = []
-    for name, test_func in tests:
-        try:
-            passed = test_func()
-            results.append((name, True, None))
-        except Exception as e:
-            results.append((name, False, str(e)))
-            print(f"\n✗ {name} FAILED: {e}")
-            import traceback
+    reports = [_run_test(name, test_func) for name, test_func in _TESTS]
 
-            traceback.print_exc()
+    results = [None] * len(reports)
+    for k, (name, error, output, _) in enumerate(reports):
+        sys.stdout.write(output)
 
-    # Summary
-    print("\n" + "=" * 70)
-    print(" " * 25 + "SUMMARY")
-    print("=" * 70)
+        results[k] = (name, error is None, error)
+        if error is not None:
+            print(f"\n✗ {name} FAILED: {error}")
+
+    # Tracebacks of the failed tests, after all reports
+    for name, error, _, tb_text in reports:
+        if error is not None:
+            sys.stderr.write(tb_text)
+
+    # Summary, written in one call
+    lines = ["\n" + "=" * 70, " " * 25 + "SUMMARY", "=" * 70]
 
     for name, passed, error in results:
         status = "✓ PASS" if passed else "✗ FAIL"
-        print(f"{status:8s} {name}")
+        lines.append(f"{status:8s} {name}")
         if error:
-            print(f"         Error: {error}")
+            lines.append(f"         Error: {error}")
 
     total = len(results)
     passed_count = sum(1 for _, p, _ in results if p)
 
-    print("=" * 70)
-    print(f"Results: {passed_count}/{total} tests passed")
+    lines.append("=" * 70)
+    lines.append(f"Results: {passed_count}/{total} tests passed")
 
     if passed_count == total:
-        print("\n🎉 ALL NUMERICAL VALIDATIONS PASSED! 🎉")
-        print("\nThe multipole formulas are numerically correct!")
-        print("\nKey findings:")
-        print("  ✓ Monopole: 1/r")
-        print("  ✓ Dipole: (xa·n)/r²")
-        print("  ✓ Quadrupole: (3(xa·n)² - |xa|²)/(2r³)")
-        print("  ✓ Q^{ii} = 0 (exact)")
-        print("  ✓ Distance dependence: 1/r^(n+1)")
-        return 0
+        lines += [
+            "\n🎉 ALL NUMERICAL VALIDATIONS PASSED! 🎉",
+            "\nThe multipole formulas are numerically correct!",
+            "\nKey findings:",
+            "  ✓ Monopole: 1/r",
+            "  ✓ Dipole: (xa·n)/r²",
+            "  ✓ Quadrupole: (3(xa·n)² - |xa|²)/(2r³)",
+            "  ✓ Q^{ii} = 0 (exact)",
+            "  ✓ Distance dependence: 1/r^(n+1)",
+        ]
+        status_code = 0
     else:
-        print(f"\n⚠ {total - passed_count} test(s) failed.")
-        return 1
+        lines.append(f"\n⚠ {total - passed_count} test(s) failed.")
+        status_code = 1
 
+    sys.stdout.write("\n".join(lines) + "\n")
+    return status_code
 
-if __name__ == "__main__":
-    import sys
 
+if __name__ == "__main__":
     sys.exit(main())